@@ -0,0 +1,10 @@
+"""
+Admin URLs, imported on first use of the admin instead of at startup. The
+admin app is installed as SimpleAdminConfig, so ModelAdmins are discovered
+here as well.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
@@ -0,0 +1,22 @@
+from django.contrib import admin
+from django.contrib.admin.apps import SimpleAdminConfig
+from django.contrib.admin.checks import check_admin_app, check_dependencies
+from django.core import checks
+
+
+def check_model_admins(app_configs, **kwargs):
+    # ModelAdmins are discovered with the admin URLs, see core/admin_urls.py.
+    # Load them so runserver, migrate, check and the tests check them all.
+    admin.autodiscover()
+    return check_admin_app(app_configs, **kwargs)
+
+
+class LazyAdminConfig(SimpleAdminConfig):
+    """
+    The admin without autodiscovery at startup, with its system checks run
+    after discovering the ModelAdmins.
+    """
+
+    def ready(self):
+        checks.register(check_dependencies, checks.Tags.admin)
+        checks.register(check_model_admins, checks.Tags.admin)
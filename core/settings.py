@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -31,7 +32,9 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Admin URLs and ModelAdmins load on first use, see core/admin_urls.py,
+    # or when the system checks run, see core/apps.py.
+    'core.apps.LazyAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -51,6 +54,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'shopping_list.middleware.ServerTimingMiddleware',
+    'shopping_list.middleware.LoadSheddingMiddleware',
+    'shopping_list.middleware.QueryInspectorMiddleware',
+    'shopping_list.middleware.DatabaseRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -81,9 +88,46 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        # Transactions take the write lock at BEGIN. A deferred transaction
+        # that reads before it writes fails at once with "database is locked"
+        # when another connection commits in between, whatever busy_timeout.
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
     }
 }
 
+# Read replicas are extra DATABASES aliases listed here, e.g.
+#     'replica': {
+#         'ENGINE': 'django.db.backends.sqlite3',
+#         'NAME': BASE_DIR / 'db.replica.sqlite3',
+#         'TEST': {'MIRROR': 'default'},
+#     },
+# Locally, `manage.py sync_replicas` copies the primary into each replica.
+#
+# Listing aliases in SHOPPING_LIST_SHARDS instead partitions shopping lists
+# and their items across them by list id. Changing the list requires
+# `manage.py rebalance_shards`.
+DATABASE_ROUTERS = [
+    'shopping_list.routers.ShardRouter',
+    'shopping_list.routers.PrimaryReplicaRouter',
+]
+SHOPPING_LIST_DATABASE_REPLICAS = []
+SHOPPING_LIST_READ_YOUR_WRITES_WINDOW = 5
+SHOPPING_LIST_SHARDS = []
+
+# Applied to every new SQLite connection, see shopping_list.receivers.
+# WAL lets readers proceed alongside the single writer and busy_timeout makes
+# writers wait for the lock instead of failing with "database is locked".
+SHOPPING_LIST_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 134217728,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -132,7 +176,8 @@ AUTH_USER_MODEL = "shopping_list.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "shopping_list.api.authentication.ExpiringTokenAuthentication",
+        "shopping_list.api.authentication.CapabilityTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
@@ -162,4 +207,115 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'Multiple shopping lists to never forget anything anymore ever.',
     'VERSION': '1.0.0',
     'SERVE_PERMISSIONS': ['rest_framework.permissions.IsAuthenticated'],
-}
\ No newline at end of file
+    'PREPROCESSING_HOOKS': ['shopping_list.api.docs.apply_deferred_schema_extensions'],
+}
+
+
+# Per-process metric snapshots are written here so the metrics endpoint can
+# aggregate across worker processes. Leave unset for a single process.
+SHOPPING_LIST_METRICS_DIR = None
+SHOPPING_LIST_METRICS_FLUSH_INTERVAL = 5
+
+
+# Opt-in reporting of slow and repeated (N+1) queries per request, logged to
+# the "shopping_list.queries" logger. Strict mode fails the request instead.
+SHOPPING_LIST_QUERY_INSPECTOR = False
+SHOPPING_LIST_QUERY_INSPECTOR_STRICT = False
+SHOPPING_LIST_SLOW_QUERY_THRESHOLD = 0.1
+SHOPPING_LIST_DUPLICATE_QUERY_THRESHOLD = 5
+
+
+# Purchased items older than this are moved to the archive table by
+# `manage.py archive_purchased_items`, or every ARCHIVE_INTERVAL seconds by a
+# background thread when that is set.
+SHOPPING_LIST_ARCHIVE_AFTER_DAYS = 90
+SHOPPING_LIST_ARCHIVE_BATCH_SIZE = 500
+SHOPPING_LIST_ARCHIVE_INTERVAL = None
+
+# Deleted shopping lists are hidden at once and their rows removed in
+# batches by a background thread, or by `manage.py purge_deleted_shopping_lists`.
+SHOPPING_LIST_PURGE_IN_BACKGROUND = True
+SHOPPING_LIST_PURGE_BATCH_SIZE = 1000
+
+# Version of the UUID primary keys given to new shopping lists and items: 4
+# (random) or 7 (time-ordered, see `manage.py benchmark_uuid_keys`).
+SHOPPING_LIST_UUID_VERSION = 4
+
+# Number of unpurchased item names stored on each shopping list for previews.
+SHOPPING_LIST_PREVIEW_SIZE = 3
+
+# Signed capability tokens from api/capability-token/, sent as
+# `Authorization: Bearer <token>`, carry the user and up to MAX_LISTS of their
+# shopping lists, so requests skip the auth and membership queries. Joining or
+# leaving a list invalidates the user's tokens through an epoch kept in the
+# cache, which must be shared between processes, as for read-your-writes.
+# The system checks refuse either with the default per-process cache.
+SHOPPING_LIST_CAPABILITY_TOKENS = False
+SHOPPING_LIST_CAPABILITY_TOKEN_MAX_AGE = 300
+SHOPPING_LIST_CAPABILITY_MAX_LISTS = 100
+
+# Lifetime in seconds of the access and refresh tokens issued by
+# api-token-auth/ and api/token-refresh/. API tokens created before logins
+# returned expiring ones keep working without a lifetime. Expired ones are
+# removed by `manage.py purge_expired_tokens`.
+SHOPPING_LIST_ACCESS_TOKEN_MAX_AGE = 60 * 60
+SHOPPING_LIST_REFRESH_TOKEN_MAX_AGE = 30 * 24 * 60 * 60
+
+# Changes to shopping lists and items are appended to an outbox table in the
+# writing transaction and delivered in batches, at least once, to the
+# handlers registered with shopping_list.outbox.handler: by a background
+# thread after each commit, or by `manage.py dispatch_outbox`.
+SHOPPING_LIST_OUTBOX = True
+SHOPPING_LIST_OUTBOX_BATCH_SIZE = 100
+SHOPPING_LIST_OUTBOX_DISPATCH_IN_BACKGROUND = True
+
+# Admin changelists count rows exactly up to this many and use the
+# database's estimate beyond it where there is one (PostgreSQL), or stop
+# counting there elsewhere.
+SHOPPING_LIST_ADMIN_EXACT_COUNT_LIMIT = 10000
+
+# Rows fetched per query while streaming exports.
+SHOPPING_LIST_EXPORT_CHUNK_SIZE = 2000
+
+# Rows validated and inserted per transaction by `manage.py
+# import_shopping_lists` and the import endpoint.
+SHOPPING_LIST_IMPORT_BATCH_SIZE = 500
+
+# The OpenAPI schema is generated once per code version and served from
+# memory. Files under SCHEMA_DIR share it between processes and restarts, see
+# `manage.py generate_schema`. CODE_VERSION defaults to a digest of the
+# project sources; deployments can set it to the release or commit instead.
+SHOPPING_LIST_SCHEMA_DIR = BASE_DIR / 'schema'
+SHOPPING_LIST_CODE_VERSION = os.environ.get('SHOPPING_LIST_CODE_VERSION')
+SHOPPING_LIST_SCHEMA_MAX_AGE = 300
+
+# Load URL patterns and serializer field maps when the WSGI/ASGI application
+# is created rather than on the first request. See `manage.py startup_report`.
+SHOPPING_LIST_WARM_UP = True
+
+# Per-URL-name concurrency limits in every worker, adapted by AIMD: a request
+# slower than LATENCY_TOLERANCE times the usual latency, or failing, cuts the
+# limit by BACKOFF and others grow it. Requests over their priority's share
+# of the limit get 503 with Retry-After. Off until it has been load-tested.
+SHOPPING_LIST_LOAD_SHEDDING = False
+SHOPPING_LIST_LOAD_SHEDDING_INITIAL_LIMIT = 20
+SHOPPING_LIST_LOAD_SHEDDING_MIN_LIMIT = 2
+SHOPPING_LIST_LOAD_SHEDDING_MAX_LIMIT = 200
+SHOPPING_LIST_LOAD_SHEDDING_LATENCY_TOLERANCE = 2.0
+SHOPPING_LIST_LOAD_SHEDDING_BACKOFF = 0.9
+SHOPPING_LIST_LOAD_SHEDDING_RETRY_AFTER = 1
+SHOPPING_LIST_LOAD_SHEDDING_PRIORITY_SHARES = {
+    "write": 1.0,
+    "user": 0.8,
+    "background": 0.5,
+}
+
+# Let identical concurrent GETs of a shopping list or its items share one
+# computation of the response. Permissions are still checked per request.
+SHOPPING_LIST_COALESCE_READS = False
+
+# `api/batch/` GETs at most MAX_PATHS endpoints per request, one after the
+# other, or in parallel on up to THREADS threads per process. Each GET is
+# routed and recorded in the metrics under its own URL name.
+SHOPPING_LIST_BATCH_MAX_PATHS = 20
+SHOPPING_LIST_BATCH_THREADS = 0
@@ -13,10 +13,11 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path, include
 
+from shopping_list.lazy_urls import lazy_include
+
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    lazy_include('admin/', 'core.admin_urls', namespace='admin'),
     path("", include("shopping_list.urls")),
 ]
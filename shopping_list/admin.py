@@ -1,7 +1,169 @@
+import json
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.utils import get_fields_from_path, lookup_spawns_duplicates
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from shopping_list.counters import touch_shopping_lists
+from shopping_list.deletion import delete_shopping_item, delete_shopping_list, delete_shopping_lists
+from shopping_list.models import ArchivedShoppingItem, Membership, ShoppingItem, ShoppingList
+
+
+def estimated_count(queryset):
+    """
+    The planner's row estimate for ``queryset``, or None on databases
+    without one.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Counts at most ``SHOPPING_LIST_ADMIN_EXACT_COUNT_LIMIT`` rows and uses
+    the planner's estimate for larger results, so changelists of big tables
+    never run a full COUNT(*). Without an estimate the count stays capped
+    and only the first pages are linked.
+    """
+
+    @cached_property
+    def count(self):
+        limit = settings.SHOPPING_LIST_ADMIN_EXACT_COUNT_LIMIT
+        count = self.object_list[:limit + 1].count()
+        if count <= limit:
+            return count
+
+        estimate = estimated_count(self.object_list)
+        if estimate is None:
+            return count
+        return max(estimate, count)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables too large to count or scan: estimated
+    page counts, no full result count and ``search_fields`` run as exact
+    lookups an index can answer. Terms that aren't valid for a field, e.g.
+    a name for an id, skip it.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+
+        query = Q()
+        may_have_duplicates = False
+        for field_name in self.get_search_fields(request):
+            field = get_fields_from_path(self.model, field_name)[-1]
+            try:
+                value = (field.target_field if field.is_relation else field).to_python(search_term)
+            except ValidationError:
+                continue
+            query |= Q(**{field_name: value})
+            may_have_duplicates |= lookup_spawns_duplicates(self.opts, field_name)
+        return (queryset.filter(query) if query else queryset.none()), may_have_duplicates
+
+
+def _purchased_changes(purchased):
+    return {"purchased": purchased, "purchased_at": timezone.now() if purchased else None}
+
+
+def _update_items(queryset, **changes):
+    """
+    Applies ``changes`` to the items in ``queryset`` with one UPDATE and
+    refreshes the counters of their shopping lists. Returns the number of
+    items changed.
+    """
+    using = queryset.db
+    with transaction.atomic(using=using):
+        shopping_list_ids = set(queryset.values_list("shopping_list_id", flat=True).distinct())
+        updated = queryset.update(**changes)
+    touch_shopping_lists(shopping_list_ids, using)
+    return updated
+
+
+class MembershipInline(admin.TabularInline):
+    model = Membership
+    raw_id_fields = ("user",)
+    readonly_fields = ("last_interaction",)
+    extra = 0
+
+
+@admin.register(ShoppingList)
+class ShoppingListAdmin(LargeTableAdmin):
+    list_display = ("name", "item_count", "unpurchased_count", "last_interaction")
+    search_fields = ("id", "members__username")
+    search_help_text = "Exact shopping list id or member username."
+    readonly_fields = ("item_count", "unpurchased_count", "last_interaction")
+    inlines = [MembershipInline]
+
+    def delete_model(self, request, obj):
+        delete_shopping_list(obj)
+
+    def delete_queryset(self, request, queryset):
+        delete_shopping_lists(queryset)
+
+    def get_deleted_objects(self, objs, request):
+        # Items and memberships are purged in the background, so the
+        # confirmation page doesn't collect them.
+        perms_needed = set() if self.has_delete_permission(request) else {self.opts.verbose_name}
+        return [str(obj) for obj in objs], {self.opts.verbose_name_plural: len(objs)}, perms_needed, []
+
+
+@admin.register(ShoppingItem)
+class ShoppingItemAdmin(LargeTableAdmin):
+    list_display = ("name", "shopping_list", "purchased", "purchased_at")
+    list_filter = ("purchased",)
+    list_select_related = ("shopping_list",)
+    raw_id_fields = ("shopping_list",)
+    search_fields = ("id", "shopping_list")
+    search_help_text = "Exact item or shopping list id."
+    actions = ["mark_purchased", "mark_unpurchased"]
+
+    @admin.action(description="Mark selected items as purchased", permissions=["change"])
+    def mark_purchased(self, request, queryset):
+        updated = _update_items(queryset.filter(purchased=False), **_purchased_changes(True))
+        self.message_user(request, f"Marked {updated} items as purchased.")
+
+    @admin.action(description="Mark selected items as not purchased", permissions=["change"])
+    def mark_unpurchased(self, request, queryset):
+        updated = _update_items(queryset.filter(purchased=True), **_purchased_changes(False))
+        self.message_user(request, f"Marked {updated} items as not purchased.")
+
+    def delete_model(self, request, obj):
+        delete_shopping_item(obj)
 
-from shopping_list.models import ShoppingItem, ShoppingList
+    def delete_queryset(self, request, queryset):
+        # Items have no delete signals, so this is a single DELETE.
+        using = queryset.db
+        shopping_list_ids = set(queryset.values_list("shopping_list_id", flat=True).distinct())
+        queryset.delete()
+        touch_shopping_lists(shopping_list_ids, using)
 
 
-admin.site.register(ShoppingItem)
-admin.site.register(ShoppingList)
+@admin.register(ArchivedShoppingItem)
+class ArchivedShoppingItemAdmin(LargeTableAdmin):
+    list_display = ("name", "shopping_list", "purchased_at", "archived_at")
+    list_select_related = ("shopping_list",)
+    raw_id_fields = ("shopping_list",)
+    search_fields = ("id", "shopping_list")
+    search_help_text = "Exact item or shopping list id."
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from shopping_list.capabilities import load_capability_token, membership_epoch
+from shopping_list.models import AccessToken, User
+from shopping_list.tokens import ACCESS_TOKEN_PREFIX, token_digest
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that also accepts the expiring access tokens issued
+    by the refresh endpoint, told apart by their prefix.
+    """
+
+    def authenticate_credentials(self, key):
+        if not key.startswith(ACCESS_TOKEN_PREFIX):
+            return super().authenticate_credentials(key)
+
+        token = AccessToken.objects.select_related("user").filter(digest=token_digest(key)).first()
+        if token is None or token.expires_at <= timezone.now():
+            raise AuthenticationFailed("Invalid or expired token.")
+        if not token.user.is_active:
+            raise AuthenticationFailed("User inactive or deleted.")
+        return token.user, token
+
+
+class CapabilityTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates `Authorization: Bearer <token>` requests with a signed
+    capability token, see shopping_list.capabilities. ``request.auth`` is the
+    token's Capability, which the permission classes check before querying
+    memberships.
+
+    Nothing is read from the database: ``request.user`` is built from the
+    token, and fields beyond its id and flags load on first access.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        if not settings.SHOPPING_LIST_CAPABILITY_TOKENS:
+            return None
+
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed("Invalid bearer header.")
+
+        try:
+            payload, capability = load_capability_token(auth[1].decode())
+        except (signing.BadSignature, UnicodeError, ValueError, KeyError, TypeError):
+            raise AuthenticationFailed("Invalid or expired capability token.")
+
+        epoch = membership_epoch(capability.user_id)
+        if epoch is None or epoch != capability.epoch:
+            raise AuthenticationFailed("Capability token is stale, request a new one.")
+
+        is_superuser, is_staff = payload["a"]
+        user = User.from_db(DEFAULT_DB_ALIAS, ["id", "is_superuser", "is_staff", "is_active"], [capability.user_id, is_superuser, is_staff, True])
+        return user, capability
+
+    def authenticate_header(self, request):
+        return self.keyword
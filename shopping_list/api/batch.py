@@ -0,0 +1,118 @@
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_to_bytes, urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.urls import Resolver404, URLPattern, get_resolver
+from rest_framework.response import Response
+
+from shopping_list.db import execute_wrapper
+from shopping_list.metrics import RequestTimings, registry
+from shopping_list.routers import routing_context
+
+logger = logging.getLogger(__name__)
+
+# Routes that can't be part of a batch: the batch itself and the streaming
+# export.
+NOT_BATCHABLE = frozenset({"batch", "export_shopping_lists"})
+
+_batchable = None
+_executor = None
+_lock = threading.Lock()
+
+
+def batchable_url_names():
+    global _batchable
+    if _batchable is None:
+        from shopping_list import urls
+
+        _batchable = frozenset(
+            pattern.name for pattern in urls.urlpatterns if isinstance(pattern, URLPattern) and pattern.name
+        ) - NOT_BATCHABLE
+    return _batchable
+
+
+def _subrequest(request, path):
+    """
+    A GET of ``path`` carrying the headers, user and credentials of the
+    already authenticated ``request``, so the view authenticates it without
+    queries and the throttles let it through, see
+    shopping_list.api.throttling.
+    """
+    url = urlsplit(path)
+    environ = {key: value for key, value in request.META.items() if key not in ("CONTENT_LENGTH", "CONTENT_TYPE")}
+    environ.update({
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": unquote_to_bytes(url.path).decode("iso-8859-1"),
+        "QUERY_STRING": url.query,
+        "wsgi.input": io.BytesIO(),
+        "wsgi.url_scheme": request.scheme,
+    })
+    subrequest = WSGIRequest(environ)
+    subrequest.COOKIES = request.COOKIES
+    subrequest.user = request.user
+    subrequest._force_auth_user = request.user
+    subrequest._force_auth_token = request.auth
+    subrequest.shopping_list_batched = True
+    return subrequest
+
+
+def _get(request, path):
+    """
+    Runs the view of ``path`` like a standalone GET: its reads are routed on
+    their own, see shopping_list.routers.routing_context, and its latency and
+    query count are recorded under its URL name. Load shedding and query
+    inspection apply to the batch request as a whole.
+    """
+    subrequest = _subrequest(request, path)
+    try:
+        match = get_resolver(getattr(request._request, "urlconf", None)).resolve(subrequest.path_info)
+    except Resolver404:
+        return {"path": path, "status": 404, "body": {"detail": "Not found."}}
+    if match.url_name not in batchable_url_names():
+        return {"path": path, "status": 400, "body": {"detail": "This path can't be part of a batch."}}
+
+    subrequest.resolver_match = match
+    subrequest._shopping_list_timings = timings = RequestTimings()
+    try:
+        with execute_wrapper(timings.count_query), routing_context(subrequest):
+            response = match.func(subrequest, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception("Batched GET of %s failed", path)
+        return {"path": path, "status": 500, "body": {"detail": "Server error."}}
+    finally:
+        registry.observe(match.url_name, timings.total(), timings.queries)
+    if not isinstance(response, Response):
+        return {"path": path, "status": 400, "body": {"detail": "This path can't be part of a batch."}}
+    return {"path": path, "status": response.status_code, "body": response.data}
+
+
+def _get_in_thread(request, path):
+    close_old_connections()
+    try:
+        return _get(request, path)
+    finally:
+        close_old_connections()
+
+
+def run_batch(request, paths):
+    """
+    GETs each of ``paths`` in-process with the user and credentials of
+    ``request`` and returns ``{"path", "status", "body"}`` for each, in
+    order. With SHOPPING_LIST_BATCH_THREADS the GETs run in parallel on a
+    thread pool, each with its own database connections.
+    """
+    threads = settings.SHOPPING_LIST_BATCH_THREADS
+    if threads <= 1 or len(paths) <= 1:
+        return [_get(request, path) for path in paths]
+
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="shopping-list-batch")
+    futures = [_executor.submit(_get_in_thread, request, path) for path in paths]
+    return [future.result() for future in futures]
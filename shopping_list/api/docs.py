@@ -0,0 +1,30 @@
+_deferred = []
+
+
+def extend_schema(**kwargs):
+    """
+    drf_spectacular's ``extend_schema`` for view methods, applied when a
+    schema is first generated. Applying it at import time would import the
+    schema generator, and everything it depends on, with the views.
+    """
+
+    def decorator(function):
+        _deferred.append((function, kwargs))
+        return function
+
+    return decorator
+
+
+def apply_deferred_schema_extensions(endpoints, **kwargs):
+    """
+    Preprocessing hook, see ``SPECTACULAR_SETTINGS``. Also registers the
+    schema extensions of this API.
+    """
+    from drf_spectacular.utils import extend_schema
+
+    import shopping_list.api.schema_extensions  # noqa: F401
+
+    while _deferred:
+        function, schema_kwargs = _deferred.pop()
+        extend_schema(**schema_kwargs)(function)
+    return endpoints
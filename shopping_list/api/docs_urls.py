@@ -0,0 +1,13 @@
+"""
+Schema and API docs URLs, imported on first use so drf_spectacular's views
+and the YAML renderer stay out of worker startup.
+"""
+from django.urls import path
+from drf_spectacular.views import SpectacularSwaggerView
+
+from shopping_list.api.schema import CachedSpectacularAPIView
+
+urlpatterns = [
+    path('schema/', CachedSpectacularAPIView.as_view(), name='schema'),
+    path('docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger_ui'),
+]
@@ -0,0 +1,118 @@
+import time
+
+from django.conf import settings
+
+from shopping_list.metrics import get_request_timings
+from shopping_list.routers import read_variant
+from shopping_list.singleflight import single_flight
+
+
+_timed_serializer_classes = {}
+
+
+def _timed_serializer_class(serializer_class):
+    """
+    A subclass of ``serializer_class`` that times ``.data`` as the ``ser``
+    phase of its request.
+    """
+    timed = _timed_serializer_classes.get(serializer_class)
+    if timed is None:
+        def data(self):
+            with self._shopping_list_timings.measure("ser"):
+                return super(timed, self).data
+
+        timed = type(serializer_class.__name__, (serializer_class,), {"__module__": serializer_class.__module__, "data": property(data)})
+        _timed_serializer_classes[serializer_class] = timed
+    return timed
+
+
+class InstrumentedViewMixin:
+    """
+    Times the authentication, throttling, permission, view, serialization
+    and rendering phases of a DRF view for the Server-Timing header. The
+    view phase leaves out the time spent serializing.
+    """
+
+    def _measure(self, phase):
+        timings = get_request_timings(self.request)
+        if timings is None:
+            return None
+        return timings.measure(phase)
+
+    def _timed(self, phase, method, *args):
+        measure = self._measure(phase)
+        if measure is None:
+            return method(*args)
+        with measure:
+            return method(*args)
+
+    def perform_authentication(self, request):
+        return self._timed("auth", super().perform_authentication, request)
+
+    def check_throttles(self, request):
+        return self._timed("throttle", super().check_throttles, request)
+
+    def check_permissions(self, request):
+        return self._timed("perm", super().check_permissions, request)
+
+    def check_object_permissions(self, request, obj):
+        return self._timed("perm", super().check_object_permissions, request, obj)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        timings = get_request_timings(self.request)
+        if timings is not None:
+            serializer.__class__ = _timed_serializer_class(serializer.__class__)
+            serializer._shopping_list_timings = timings
+        return serializer
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._view_started = time.perf_counter()
+        timings = get_request_timings(request)
+        self._serialization_before_view = timings.phases.get("ser", 0.0) if timings is not None else 0.0
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        timings = get_request_timings(request)
+        if timings is None:
+            return response
+
+        view_finished = time.perf_counter()
+        view_started = getattr(self, "_view_started", None)
+        if view_started is not None:
+            serialization = timings.phases.get("ser", 0.0) - self._serialization_before_view
+            timings.add("view", view_finished - view_started - serialization)
+
+        if hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(lambda rendered: timings.add("render", time.perf_counter() - view_finished))
+
+        return response
+
+
+class CoalescedReadMixin:
+    """
+    With ``SHOPPING_LIST_COALESCE_READS``, identical concurrent GETs share
+    one computation of their response data. Requests are identical when they
+    resolve to the same view and URL kwargs with the same query parameters,
+    renderer and database. Views check permissions for every request
+    themselves, outside the shared computation.
+    """
+
+    def coalesce(self, request, compute, part=None):
+        """
+        Returns ``compute()``, or the result of an identical request's call.
+        ``part`` tells apart several computations shared by one request.
+        """
+        if not settings.SHOPPING_LIST_COALESCE_READS or request.method != "GET":
+            return compute()
+
+        key = (
+            request.resolver_match.url_name,
+            part,
+            tuple(sorted(self.kwargs.items())),
+            tuple(sorted((name, tuple(values)) for name, values in request.query_params.lists())),
+            request.accepted_renderer.format,
+            read_variant(),
+        )
+        return single_flight.do(key, compute)
@@ -1,5 +1,33 @@
 from rest_framework import permissions
-from shopping_list.models import ShoppingList
+from rest_framework.generics import get_object_or_404
+from shopping_list.capabilities import Capability
+from shopping_list.models import Membership, ShoppingList
+from shopping_list.routers import shard_for
+
+
+def capability_allows(request, shopping_list_id):
+    """
+    Membership as decided by the request's capability token, or None when
+    the request has none or it doesn't decide, see Capability.allows.
+    """
+    if isinstance(request.auth, Capability):
+        return request.auth.allows(shopping_list_id)
+    return None
+
+
+def is_shopping_list_member(request, shopping_list_id):
+    """
+    Membership check for a shopping list other than the one in the URL,
+    e.g. the target of a move. Superusers may use any existing list.
+    """
+    using = shard_for(shopping_list_id)
+    if request.user.is_superuser:
+        return ShoppingList.objects.using(using).filter(id=shopping_list_id).exists()
+
+    allowed = capability_allows(request, shopping_list_id)
+    if allowed is not None:
+        return allowed
+    return Membership.objects.using(using).filter(shoppinglist_id=shopping_list_id, shoppinglist__deleted_at__isnull=True, user=request.user).exists()
 
 
 class ShoppingListMembersOnly(permissions.BasePermission):
@@ -7,6 +35,10 @@ class ShoppingListMembersOnly(permissions.BasePermission):
         if request.user.is_superuser:
             return True
 
+        allowed = capability_allows(request, obj.pk)
+        if allowed is not None:
+            return allowed
+
         if request.user in obj.members.all():
             return True
 
@@ -18,6 +50,10 @@ class ShoppingItemShoppingListMembersOnly(permissions.BasePermission):
         if request.user.is_superuser:
             return True
 
+        allowed = capability_allows(request, obj.shopping_list_id)
+        if allowed is not None:
+            return allowed
+
         if request.user in obj.shopping_list.members.all():
             return True
 
@@ -26,11 +62,14 @@ class ShoppingItemShoppingListMembersOnly(permissions.BasePermission):
 
 class AllShoppingItemsShoppingListMembersOnly(permissions.BasePermission):
     def has_permission(self, request, view):
-        if request.user.is_superuser:
-            return True
+        if not request.user.is_superuser:
+            allowed = capability_allows(request, view.kwargs.get("pk"))
+            if allowed is not None:
+                return allowed
 
-        current_shopping_list = ShoppingList.objects.get(pk=view.kwargs.get("pk"))
-        if request.user in current_shopping_list.members.all():
+        # Deleted lists are not found, for superusers too.
+        current_shopping_list = get_object_or_404(ShoppingList.objects.using(shard_for(view.kwargs.get("pk"))), pk=view.kwargs.get("pk"))
+        if request.user.is_superuser or request.user in current_shopping_list.members.all():
             return True
 
         return False
@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass
+from importlib import import_module
+from pathlib import Path
+
+import django
+import drf_spectacular
+import rest_framework
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+
+_lock = threading.Lock()
+_loaded = {}
+_source_digest = None
+
+
+@dataclass(frozen=True)
+class SchemaVariant:
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+    @classmethod
+    def from_body(cls, body, gzipped=None):
+        return cls(body, gzipped or gzip.compress(body, compresslevel=9, mtime=0), f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+def code_version():
+    """
+    ``SHOPPING_LIST_CODE_VERSION`` or, when unset, a digest of the project's
+    Python sources, the schema settings and the versions of the libraries
+    that generate the schema.
+    """
+    global _source_digest
+    if settings.SHOPPING_LIST_CODE_VERSION:
+        return settings.SHOPPING_LIST_CODE_VERSION
+
+    if _source_digest is None:
+        digest = hashlib.sha256(f"{django.__version__} {rest_framework.VERSION} {drf_spectacular.__version__}".encode())
+        digest.update(repr(sorted(settings.SPECTACULAR_SETTINGS.items())).encode())
+        packages = {Path(__file__).resolve().parents[1], Path(import_module(settings.ROOT_URLCONF).__file__).resolve().parent}
+        for package in sorted(packages):
+            for source in sorted(package.rglob("*.py")):
+                if "tests" not in source.relative_to(package).parts:
+                    digest.update(str(source.relative_to(package.parent)).encode())
+                    digest.update(source.read_bytes())
+        _source_digest = digest.hexdigest()[:16]
+    return _source_digest
+
+
+def generate_schema():
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+    return {schema_format: SchemaVariant.from_body(renderer().render(schema, renderer_context={})) for schema_format, renderer in RENDERERS.items()}
+
+
+def _path(directory, version, schema_format):
+    return Path(directory) / f"openapi-{version}.{schema_format}"
+
+
+def write_schema(directory, version, variants):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for schema_format, variant in variants.items():
+        path = _path(directory, version, schema_format)
+        for target, content in ((path, variant.body), (path.with_name(f"{path.name}.gz"), variant.gzipped)):
+            # Written aside and renamed so other processes never read half a file.
+            temporary = target.with_name(f".{target.name}.tmp")
+            temporary.write_bytes(content)
+            temporary.replace(target)
+
+    for stale in directory.glob("openapi-*"):
+        if not stale.name.startswith(f"openapi-{version}."):
+            stale.unlink(missing_ok=True)
+
+
+def _read_schema(directory, version):
+    variants = {}
+    for schema_format in RENDERERS:
+        path = _path(directory, version, schema_format)
+        gzipped = path.with_name(f"{path.name}.gz")
+        if not path.exists() or not gzipped.exists():
+            return None
+        variants[schema_format] = SchemaVariant.from_body(path.read_bytes(), gzipped.read_bytes())
+    return variants
+
+
+def schema_variants():
+    """
+    The rendered schema for the current code version, read from
+    ``SHOPPING_LIST_SCHEMA_DIR`` or generated and written there on first use,
+    then kept in memory.
+    """
+    directory = settings.SHOPPING_LIST_SCHEMA_DIR
+    key = (str(directory), code_version())
+    variants = _loaded.get(key)
+    if variants is not None:
+        return variants
+
+    with _lock:
+        if key not in _loaded:
+            variants = _read_schema(directory, key[1]) if directory else None
+            if variants is None:
+                variants = generate_schema()
+                if directory:
+                    write_schema(directory, key[1], variants)
+            _loaded.clear()
+            _loaded[key] = variants
+        return _loaded[key]
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    OpenAPI 3 schema for this API, YAML by default or JSON with
+    `Accept: application/vnd.oai.openapi+json`. Responses carry an ETag and
+    are gzip-compressed when the client accepts it.
+    """
+
+    def _get_schema_response(self, request):
+        # Served from schema_variants() instead of introspecting every view
+        # on each request.
+        renderer = request.accepted_renderer
+        variant = schema_variants()[renderer.format]
+
+        if variant.etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponse(status=304)
+        elif "gzip" in request.headers.get("Accept-Encoding", ""):
+            response = HttpResponse(variant.gzipped, content_type=renderer.media_type)
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(variant.body, content_type=renderer.media_type)
+
+        response["ETag"] = variant.etag
+        response["Content-Disposition"] = f'inline; filename="{spectacular_settings.TITLE or "schema"}.{renderer.format}"'
+        # The schema is only served to authenticated users, so keep it out
+        # of shared caches.
+        patch_cache_control(response, private=True, max_age=settings.SHOPPING_LIST_SCHEMA_MAX_AGE)
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
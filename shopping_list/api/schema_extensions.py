@@ -0,0 +1,13 @@
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+
+
+class CapabilityTokenScheme(OpenApiAuthenticationExtension):
+    target_class = "shopping_list.api.authentication.CapabilityTokenAuthentication"
+    name = "capabilityToken"
+
+    def get_security_definition(self, auto_schema):
+        return {
+            "type": "http",
+            "scheme": "bearer",
+            "description": "Short-lived token from `api/capability-token/`.",
+        }
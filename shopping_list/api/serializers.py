@@ -1,11 +1,50 @@
 from typing import TypedDict, List
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from shopping_list.models import ShoppingItem, ShoppingList
+from shopping_list.routers import shard_for
 
 User = get_user_model()
 
+DUPLICATE_ITEM = "There's already this item on the list"
+
+
+def requested_fields(request):
+    """
+    Field names from a comma-separated ``?fields=`` parameter, or None when
+    every field is wanted.
+    """
+    value = request.query_params.get("fields") if request is not None else None
+    if not value:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def requested_expansions(request):
+    value = request.query_params.get("expand", "") if request is not None else ""
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Drops fields not named in ``?fields=`` from the top-level serializer of a
+    read, so omitted method fields are never computed.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        top_level = self.root.child if isinstance(self.root, serializers.ListSerializer) else self.root
+        if self is not top_level or request is None or request.method not in ("GET", "HEAD"):
+            return fields
+
+        requested = requested_fields(request)
+        if requested is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in requested}
+
 
 class UnpurchasedItem(TypedDict):
     name: str
@@ -17,7 +56,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username']
 
 
-class ShoppingItemSerializer(serializers.ModelSerializer):
+class ShoppingItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ShoppingItem
         fields = ["id", "name", "purchased"]
@@ -26,24 +65,64 @@ class ShoppingItemSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data['shopping_list_id'] = self.context['request'].parser_context['kwargs']['pk']
 
-        if ShoppingList.objects.get(id=validated_data['shopping_list_id']).shopping_items.filter(name=validated_data["name"], purchased=False):
-            raise serializers.ValidationError("There's already this item on the list")
+        if ShoppingList.objects.using(shard_for(validated_data['shopping_list_id'])).get(id=validated_data['shopping_list_id']).shopping_items.filter(name=validated_data["name"], purchased=False):
+            raise serializers.ValidationError(DUPLICATE_ITEM)
         return super().create(validated_data)
 
 
-class ShoppingListSerializer(serializers.ModelSerializer):
+class ShoppingListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     members = UserSerializer(many=True, read_only=True)
     unpurchased_items = serializers.SerializerMethodField()
 
     class Meta:
         model = ShoppingList
-        fields = ["id", "name", "unpurchased_items", "members", "last_interaction"]
+        fields = ["id", "name", "unpurchased_items", "item_count", "unpurchased_count", "members", "last_interaction"]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Views opt in by putting "expand" in the serializer context.
+        if "items" in self.context.get("expand", ()):
+            fields["items"] = ShoppingItemSerializer(many=True, read_only=True, source="shopping_items")
+        return fields
 
     def get_unpurchased_items(self, obj) -> List[UnpurchasedItem]:
-        return [{"name": shopping_item.name} for shopping_item in obj.shopping_items.filter(purchased=False)][:3]
+        return [{"name": name} for name in obj.unpurchased_preview]
+
+
+class DuplicateShoppingListSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=200, required=False, help_text="Defaults to the name of the original list.")
+    unpurchased_only = serializers.BooleanField(default=False)
+    reset_purchased = serializers.BooleanField(default=False, help_text="Copy every item once as unpurchased.")
+
+
+class MoveShoppingItemsSerializer(serializers.Serializer):
+    items = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=500)
+    to = serializers.UUIDField(help_text="The shopping list to move the items to.")
+
+
+class BatchSerializer(serializers.Serializer):
+    paths = serializers.ListField(
+        child=serializers.RegexField(r"^/", max_length=2000),
+        allow_empty=False,
+        max_length=settings.SHOPPING_LIST_BATCH_MAX_PATHS,
+        help_text="Paths of GET endpoints of this API, with their query strings.",
+    )
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    path = serializers.CharField()
+    status = serializers.IntegerField()
+    body = serializers.JSONField()
+
+
+class MovedShoppingItemsSerializer(serializers.Serializer):
+    moved = serializers.ListField(child=serializers.UUIDField())
+    errors = serializers.ListField(child=serializers.DictField(), help_text='`{"id", "error": "not_found" | "duplicate"}` per item not moved.')
 
 
 class AddMemberSerializer(serializers.ModelSerializer):
+    members = serializers.PrimaryKeyRelatedField(many=True, queryset=User.objects.all())
+
     class Meta:
         model = ShoppingList
         fields = ["members"]
@@ -57,6 +136,8 @@ class AddMemberSerializer(serializers.ModelSerializer):
 
 
 class RemoveMemberSerializer(serializers.ModelSerializer):
+    members = serializers.PrimaryKeyRelatedField(many=True, queryset=User.objects.all())
+
     class Meta:
         model = ShoppingList
         fields = ["members"]
@@ -67,3 +148,18 @@ class RemoveMemberSerializer(serializers.ModelSerializer):
             instance.save()
 
         return instance
+
+
+class CapabilityTokenSerializer(serializers.Serializer):
+    token = serializers.CharField()
+    expires_in = serializers.IntegerField(help_text="Seconds until the token expires.")
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    refresh_token = serializers.CharField(write_only=True)
+
+
+class TokenPairSerializer(serializers.Serializer):
+    token = serializers.CharField()
+    expires_in = serializers.IntegerField(help_text="Seconds until the token expires.")
+    refresh_token = serializers.CharField()
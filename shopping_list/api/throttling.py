@@ -1,9 +1,21 @@
 from rest_framework.throttling import UserRateThrottle
 
 
-class MinuteRateThrottle(UserRateThrottle):
+class BatchedUserRateThrottle(UserRateThrottle):
+    """
+    Lets the GETs of a batch through: the batch request was throttled once
+    for all of them, see shopping_list.api.batch.
+    """
+
+    def allow_request(self, request, view):
+        if getattr(request._request, "shopping_list_batched", False):
+            return True
+        return super().allow_request(request, view)
+
+
+class MinuteRateThrottle(BatchedUserRateThrottle):
     scope = "user_minute"
 
 
-class DailyRateThrottle(UserRateThrottle):
+class DailyRateThrottle(BatchedUserRateThrottle):
     scope = "user_day"
@@ -1,30 +1,117 @@
-from drf_spectacular.utils import extend_schema
+import uuid
+from collections import defaultdict
+from operator import attrgetter
+
+from drf_spectacular.types import OpenApiTypes
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.db.models import Exists, OuterRef, Prefetch
 from rest_framework import generics, status, filters
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import AuthenticationFailed, NotFound, PermissionDenied, UnsupportedMediaType, ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from shopping_list.api.serializers import ShoppingListSerializer, ShoppingItemSerializer, AddMemberSerializer, RemoveMemberSerializer
-from shopping_list.models import ShoppingList, ShoppingItem
-from shopping_list.api.permissions import AllShoppingItemsShoppingListMembersOnly, ShoppingItemShoppingListMembersOnly, ShoppingListMembersOnly
+from shopping_list.api.serializers import ShoppingListSerializer, ShoppingItemSerializer, AddMemberSerializer, RemoveMemberSerializer, BatchResponseSerializer, BatchSerializer, CapabilityTokenSerializer, DuplicateShoppingListSerializer, MoveShoppingItemsSerializer, MovedShoppingItemsSerializer, RefreshTokenSerializer, TokenPairSerializer, requested_expansions, requested_fields
+from shopping_list.models import ArchivedShoppingItem, Membership, ShoppingList, ShoppingItem
+from shopping_list.api.permissions import AllShoppingItemsShoppingListMembersOnly, ShoppingItemShoppingListMembersOnly, ShoppingListMembersOnly, is_shopping_list_member
 from shopping_list.api.pagination import LargerResultsSetPagination
+from shopping_list.api.batch import run_batch
+from shopping_list.api.docs import extend_schema
+from shopping_list.api.mixins import CoalescedReadMixin, InstrumentedViewMixin
+from shopping_list.api.renderers import CSVRenderer, NDJSONRenderer, PlainTextRenderer
+from shopping_list.bulk import duplicate_shopping_list, move_shopping_items
+from shopping_list.capabilities import Capability, issue_capability_token
+from shopping_list.deletion import delete_shopping_item, delete_shopping_list
+from shopping_list.export import export_lines
+from shopping_list.imports import ShoppingListImporter, read_rows
+from shopping_list.metrics import render_metrics
+from shopping_list.routers import scatter_gather, shard_for
+from shopping_list.tokens import issue_tokens, refresh_access_token
+
+
+def shopping_list_queryset(queryset, request):
+    """
+    Loads only what the ``?fields=`` of a read will serialize: members are
+    prefetched when requested and the item preview is deferred when not.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return queryset.prefetch_related("members")
+
+    fields = requested_fields(request)
+    if fields is None or "members" in fields:
+        queryset = queryset.prefetch_related("members")
+    if fields is not None and "unpurchased_items" not in fields:
+        queryset = queryset.defer("unpurchased_preview")
+    return queryset
 
 
-class ListAddShoppingList(generics.ListCreateAPIView):
+class ListAddShoppingList(InstrumentedViewMixin, generics.ListCreateAPIView):
     """
     Returns a list of all shopping lists user is a member of. Each shopping
     list includes a few unpurchased shopping items. Users can add a new
-    shopping list.
+    shopping list. Limit the output with `?fields=id,name`.
+
+    `?ids=a,b,c` returns those shopping lists in the requested order instead,
+    with `{"id": ..., "error": "not_found" | "forbidden"}` in place of lists
+    that do not exist or the user is not a member of.
     """
     serializer_class = ShoppingListSerializer
+    max_ids = 50
+
+    def list(self, request, *args, **kwargs):
+        if "ids" in request.query_params:
+            return Response({"results": self.retrieve_many(request.query_params["ids"])})
+        return super().list(request, *args, **kwargs)
+
+    def retrieve_many(self, value):
+        try:
+            ids = list(dict.fromkeys(uuid.UUID(part.strip()) for part in value.split(",") if part.strip()))
+        except ValueError:
+            raise ValidationError({"ids": "Expected comma-separated shopping list ids."})
+        if len(ids) > self.max_ids:
+            raise ValidationError({"ids": f"At most {self.max_ids} ids per request."})
+
+        ids_by_shard = defaultdict(list)
+        for shopping_list_id in ids:
+            ids_by_shard[shard_for(shopping_list_id)].append(shopping_list_id)
+
+        # Existence and membership of every id come from one query per shard.
+        is_member = Exists(Membership.objects.filter(shoppinglist=OuterRef("pk"), user=self.request.user))
+        found = {}
+        for alias, shard_ids in ids_by_shard.items():
+            queryset = ShoppingList.objects.using(alias).filter(id__in=shard_ids).annotate(is_member=is_member)
+            found.update((shopping_list.id, shopping_list) for shopping_list in shopping_list_queryset(queryset, self.request))
+
+        allowed = [shopping_list for shopping_list in found.values() if shopping_list.is_member or self.request.user.is_superuser]
+        serialized = dict(zip((shopping_list.id for shopping_list in allowed), self.get_serializer(allowed, many=True).data))
+
+        results = []
+        for shopping_list_id in ids:
+            if shopping_list_id in serialized:
+                results.append(serialized[shopping_list_id])
+            else:
+                results.append({"id": str(shopping_list_id), "error": "forbidden" if shopping_list_id in found else "not_found"})
+        return results
 
     def perform_create(self, serializer):
         return serializer.save(members=[self.request.user])
 
     def get_queryset(self):
-        return ShoppingList.objects.filter(members=self.request.user).order_by("-last_interaction")
+        # Served by Membership's (user, -last_interaction) index.
+        queryset = ShoppingList.objects.filter(memberships__user=self.request.user).order_by("-memberships__last_interaction")
+        queryset = shopping_list_queryset(queryset, self.request)
+        return scatter_gather(queryset, key=attrgetter("last_interaction"), reverse=True)
 
 
-class ListAddShoppingItem(generics.ListCreateAPIView):
+class ListAddShoppingItem(CoalescedReadMixin, InstrumentedViewMixin, generics.ListCreateAPIView):
+    """
+    Returns the items on a shopping list, unpurchased first. Archived
+    purchased items are included with `?include_archived=true`.
+    """
     serializer_class = ShoppingItemSerializer
     permission_classes = [AllShoppingItemsShoppingListMembersOnly]
     pagination_class = LargerResultsSetPagination
@@ -33,34 +120,91 @@ class ListAddShoppingItem(generics.ListCreateAPIView):
 
     def get_queryset(self):
         shopping_list = self.kwargs['pk']
-        return ShoppingItem.objects.filter(shopping_list=shopping_list).order_by("purchased")
+        queryset = ShoppingItem.objects.using(shard_for(shopping_list)).filter(shopping_list=shopping_list)
+
+        if self.request.method == "GET" and self.request.query_params.get("include_archived") == "true":
+            archived = ArchivedShoppingItem.objects.using(shard_for(shopping_list)).filter(shopping_list=shopping_list)
+            fields = ("id", "name", "purchased")
+            return queryset.values(*fields).union(archived.values(*fields), all=True).order_by("purchased")
+
+        return queryset.order_by("purchased")
 
+    def list(self, request, *args, **kwargs):
+        # Membership was checked by has_permission before this runs.
+        return Response(self.coalesce(request, lambda: super(ListAddShoppingItem, self).list(request, *args, **kwargs).data))
 
-class ShoppingListDetail(generics.RetrieveUpdateDestroyAPIView):
+    def perform_create(self, serializer):
+        with transaction.atomic(using=shard_for(self.kwargs["pk"])):
+            serializer.save()
+
+
+class ShoppingListDetail(CoalescedReadMixin, InstrumentedViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    """
+    Returns a shopping list. `?expand=items` embeds every item on the list,
+    unpurchased first.
+    """
     queryset = ShoppingList.objects.all()
     serializer_class = ShoppingListSerializer
     permission_classes = [ShoppingListMembersOnly]
 
+    def get_queryset(self):
+        queryset = shopping_list_queryset(super().get_queryset().using(shard_for(self.kwargs["pk"])), self.request)
+        if "items" in self.expand:
+            queryset = queryset.prefetch_related(Prefetch("shopping_items", queryset=ShoppingItem.objects.order_by("purchased", "name")))
+        return queryset
+
+    @property
+    def expand(self):
+        if self.request is None or self.request.method not in ("GET", "HEAD"):
+            return set()
+        return requested_expansions(self.request) & {"items"}
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["expand"] = self.expand
+        return context
+
+    def retrieve(self, request, *args, **kwargs):
+        # Membership is checked per requester against the shared instance,
+        # from its prefetched members unless ?fields= leaves them out, before
+        # anything is serialized for them.
+        instance = self.coalesce(request, lambda: get_object_or_404(self.filter_queryset(self.get_queryset()), pk=self.kwargs["pk"]))
+        self.check_object_permissions(request, instance)
+        return Response(self.coalesce(request, lambda: self.get_serializer(instance).data, part="data"))
+
+    def perform_destroy(self, instance):
+        delete_shopping_list(instance)
 
-class AddShoppingItem(generics.CreateAPIView):
+
+class AddShoppingItem(InstrumentedViewMixin, generics.CreateAPIView):
     queryset = ShoppingItem.objects.all()
     serializer_class = ShoppingItemSerializer
     permission_classes = [AllShoppingItemsShoppingListMembersOnly]
 
 
-class ShoppingItemDetail(generics.RetrieveUpdateDestroyAPIView):
+class ShoppingItemDetail(InstrumentedViewMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = ShoppingItem.objects.all()
     serializer_class = ShoppingItemSerializer
     permission_classes = [ShoppingItemShoppingListMembersOnly]
     lookup_url_kwarg = 'item_pk'
 
+    def get_queryset(self):
+        return super().get_queryset().using(shard_for(self.kwargs["pk"])).filter(shopping_list__deleted_at__isnull=True)
+
+    def perform_update(self, serializer):
+        with transaction.atomic(using=shard_for(self.kwargs["pk"])):
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        delete_shopping_item(instance)
 
-class ShoppingListAddMembers(APIView):
+
+class ShoppingListAddMembers(InstrumentedViewMixin, APIView):
     permission_classes = [ShoppingListMembersOnly]
 
     @extend_schema(request=AddMemberSerializer, responses=AddMemberSerializer)
     def put(self, request, pk, format=None):
-        shopping_list = ShoppingList.objects.get(pk=pk)
+        shopping_list = ShoppingList.objects.using(shard_for(pk)).get(pk=pk)
         serializer = AddMemberSerializer(shopping_list, data=request.data)
         self.check_object_permissions(request, shopping_list)
 
@@ -71,12 +215,12 @@ class ShoppingListAddMembers(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ShoppingListRemoveMembers(APIView):
+class ShoppingListRemoveMembers(InstrumentedViewMixin, APIView):
     permission_classes = [ShoppingListMembersOnly]
 
     @extend_schema(request=RemoveMemberSerializer, responses=RemoveMemberSerializer)
     def put(self, request, pk, format=None):
-        shopping_list = ShoppingList.objects.get(pk=pk)
+        shopping_list = ShoppingList.objects.using(shard_for(pk)).get(pk=pk)
         serializer = RemoveMemberSerializer(shopping_list, data=request.data)
         self.check_object_permissions(request, shopping_list)
 
@@ -87,7 +231,118 @@ class ShoppingListRemoveMembers(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class SearchShoppingItems(generics.ListAPIView):
+class DuplicateShoppingList(InstrumentedViewMixin, APIView):
+    """
+    Copies a shopping list and its items, or only the unpurchased ones, into
+    a new list with you as its only member.
+    """
+    permission_classes = [ShoppingListMembersOnly]
+
+    @extend_schema(request=DuplicateShoppingListSerializer, responses={201: ShoppingListSerializer})
+    def post(self, request, pk, format=None):
+        shopping_list = get_object_or_404(ShoppingList.objects.using(shard_for(pk)), pk=pk)
+        self.check_object_permissions(request, shopping_list)
+        serializer = DuplicateShoppingListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        copy = duplicate_shopping_list(shopping_list, request.user, **serializer.validated_data)
+        return Response(ShoppingListSerializer(copy, context={"request": request}).data, status=status.HTTP_201_CREATED)
+
+
+class MoveShoppingItems(InstrumentedViewMixin, APIView):
+    """
+    Moves items to another shopping list you are a member of. Unpurchased
+    items whose name is already unpurchased on that list stay where they are
+    and are reported as duplicates.
+    """
+    permission_classes = [AllShoppingItemsShoppingListMembersOnly]
+
+    @extend_schema(request=MoveShoppingItemsSerializer, responses=MovedShoppingItemsSerializer)
+    def post(self, request, pk, format=None):
+        serializer = MoveShoppingItemsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = serializer.validated_data["to"]
+        if target == pk:
+            raise ValidationError({"to": ["The items are already on this list."]})
+        if not is_shopping_list_member(request, target):
+            raise ValidationError({"to": ["Not found."]})
+
+        moved, errors = move_shopping_items(pk, target, list(dict.fromkeys(serializer.validated_data["items"])))
+        return Response({"moved": moved, "errors": errors})
+
+
+class ObtainAuthTokenWithRefresh(ObtainAuthToken):
+    """
+    Checks a username and password and returns an expiring API token with a
+    refresh token for `api/token-refresh/`, so clients don't have to send
+    their password again when the token expires. API tokens issued before
+    tokens expired keep working.
+    """
+
+    @extend_schema(responses=TokenPairSerializer)
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(issue_tokens(serializer.validated_data["user"]))
+
+
+class RefreshAccessToken(InstrumentedViewMixin, APIView):
+    """
+    Exchanges a refresh token for a new expiring API token and a new refresh
+    token, without a password. Each refresh token works once; using one
+    again revokes every token descending from the same login.
+    """
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = []
+
+    @extend_schema(request=RefreshTokenSerializer, responses=TokenPairSerializer)
+    def post(self, request, format=None):
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens = refresh_access_token(serializer.validated_data["refresh_token"])
+        if tokens is None:
+            raise AuthenticationFailed("Invalid, expired or already used refresh token.")
+        return Response(tokens)
+
+    def get_authenticate_header(self, request):
+        # A 401 rather than 403 tells clients to log in with their password.
+        return "Token"
+
+
+class IssueCapabilityToken(InstrumentedViewMixin, APIView):
+    """
+    Issues a short-lived capability token for the `Authorization: Bearer`
+    header. Requests made with it skip the authentication and membership
+    queries. It stops working as soon as the user joins or leaves a shopping
+    list; request a new one with your regular credentials then.
+    """
+
+    @extend_schema(request=None, responses=CapabilityTokenSerializer)
+    def post(self, request, format=None):
+        if not settings.SHOPPING_LIST_CAPABILITY_TOKENS:
+            raise NotFound()
+        if isinstance(request.auth, Capability):
+            raise PermissionDenied("Capability tokens can't be used to issue new ones.")
+        return Response(issue_capability_token(request.user), status=status.HTTP_201_CREATED)
+
+
+class Batch(InstrumentedViewMixin, APIView):
+    """
+    Runs several GETs of this API in one request, e.g. everything a client
+    loads when it starts. Authentication and throttling happen once for the
+    batch; each GET still checks its own permissions. Returns the status and
+    body of every path, in order.
+    """
+
+    @extend_schema(request=BatchSerializer, responses=BatchResponseSerializer(many=True))
+    def post(self, request, format=None):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(run_batch(request, serializer.validated_data["paths"]))
+
+
+class SearchShoppingItems(InstrumentedViewMixin, generics.ListAPIView):
     serializer_class = ShoppingItemSerializer
 
     filter_backends = (filters.SearchFilter,)
@@ -96,3 +351,53 @@ class SearchShoppingItems(generics.ListAPIView):
     def get_queryset(self):
         users_shopping_lists = ShoppingList.objects.filter(members=self.request.user)
         return ShoppingItem.objects.filter(shopping_list__in=users_shopping_lists).order_by("name")
+
+    def filter_queryset(self, queryset):
+        return scatter_gather(super().filter_queryset(queryset), key=attrgetter("name"))
+
+
+class Metrics(InstrumentedViewMixin, APIView):
+    """
+    Request latency and query-count histograms per URL name in the
+    Prometheus text exposition format.
+    """
+    permission_classes = [IsAdminUser]
+    renderer_classes = [PlainTextRenderer]
+    throttle_classes = []
+
+    @extend_schema(exclude=True)
+    def get(self, request, format=None):
+        return Response(render_metrics())
+
+
+class ExportShoppingLists(InstrumentedViewMixin, APIView):
+    """
+    Streams every shopping list the user is a member of, with its memberships
+    and items, as NDJSON or as CSV with `?format=csv`.
+    """
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    @extend_schema(responses={(200, "application/x-ndjson"): OpenApiTypes.STR, (200, "text/csv"): OpenApiTypes.STR})
+    def get(self, request, format=None):
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(export_lines(request.user, renderer.format), content_type=f"{renderer.media_type}; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="shopping-lists.{renderer.format}"'
+        return response
+
+
+class ImportShoppingLists(InstrumentedViewMixin, APIView):
+    """
+    Creates shopping lists and items from a CSV or NDJSON request body in the
+    export format, read line by line. Returns the number of lists and items
+    created and the errors of rejected rows.
+    """
+    content_types = {"text/csv": "csv", "application/x-ndjson": "ndjson"}
+
+    @extend_schema(request={"text/csv": OpenApiTypes.STR, "application/x-ndjson": OpenApiTypes.STR}, responses=OpenApiTypes.OBJECT)
+    def post(self, request, format=None):
+        import_format = self.content_types.get(request.content_type.split(";")[0].strip())
+        if import_format is None:
+            raise UnsupportedMediaType(request.content_type)
+
+        lines = (line.decode("utf-8-sig") for line in (request.stream or ()))
+        return Response(ShoppingListImporter(request.user).run(read_rows(lines, import_format)))
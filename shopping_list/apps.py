@@ -6,4 +6,8 @@ class ShoppingListConfig(AppConfig):
     name = 'shopping_list'
 
     def ready(self):
+        import shopping_list.checks
         import shopping_list.receivers
+        from shopping_list.archive import start_archive_job
+
+        start_archive_job()
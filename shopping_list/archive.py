@@ -0,0 +1,68 @@
+import logging
+from collections import Counter
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, transaction
+from django.utils import timezone
+
+from shopping_list.counters import update_shopping_list
+from shopping_list.models import ArchivedShoppingItem, ShoppingItem
+from shopping_list.routers import shard_databases
+
+logger = logging.getLogger(__name__)
+
+
+def archive_purchased_items(using=DEFAULT_DB_ALIAS, older_than=None, batch_size=None):
+    """
+    Moves items purchased before ``older_than`` into the archive table. Each
+    batch is its own short transaction so writers are never blocked for
+    long. Returns the number of archived items.
+    """
+    if older_than is None:
+        older_than = timezone.now() - timedelta(days=settings.SHOPPING_LIST_ARCHIVE_AFTER_DAYS)
+    batch_size = batch_size or settings.SHOPPING_LIST_ARCHIVE_BATCH_SIZE
+
+    archived = 0
+    while True:
+        with transaction.atomic(using=using):
+            batch = list(
+                ShoppingItem.objects.using(using)
+                .filter(purchased=True, purchased_at__lt=older_than)
+                .values("id", "name", "purchased_at", "shopping_list_id")[:batch_size]
+            )
+            if not batch:
+                return archived
+
+            ArchivedShoppingItem.objects.using(using).bulk_create([ArchivedShoppingItem(**item) for item in batch])
+            ShoppingItem.objects.using(using).filter(id__in=[item["id"] for item in batch]).delete()
+            for shopping_list_id, count in Counter(item["shopping_list_id"] for item in batch).items():
+                update_shopping_list(shopping_list_id, using, items=-count, touch=False)
+
+        archived += len(batch)
+
+
+def _run_archive_job(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            for using in shard_databases():
+                archived = archive_purchased_items(using=using)
+                if archived:
+                    logger.info("Archived %d purchased items on %s", archived, using)
+        except Exception:
+            logger.exception("Archiving purchased items failed")
+        finally:
+            close_old_connections()
+
+
+def start_archive_job():
+    """
+    Runs the archive every ``SHOPPING_LIST_ARCHIVE_INTERVAL`` seconds in a
+    daemon thread of the current process.
+    """
+    interval = settings.SHOPPING_LIST_ARCHIVE_INTERVAL
+    if interval:
+        threading.Thread(target=_run_archive_job, args=(interval,), name="shopping-list-archive", daemon=True).start()
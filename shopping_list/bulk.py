@@ -0,0 +1,125 @@
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from shopping_list.counters import touch_shopping_lists
+from shopping_list.models import ShoppingItem, ShoppingList
+from shopping_list.routers import shard_for
+from shopping_list.uuids import generate_uuid
+
+# SQL giving each copied row a new primary key, see
+# shopping_list.receivers.configure_sqlite_connection.
+NEW_ID_SQL = {
+    "sqlite": "shopping_list_uuid()",
+    "postgresql": "gen_random_uuid()",
+}
+
+
+def _alias(shopping_list_id):
+    return shard_for(shopping_list_id) or DEFAULT_DB_ALIAS
+
+
+def _copy_items(source_id, target_id, using, unpurchased_only, reset_purchased):
+    """
+    Copies the items of one list into another with INSERT ... SELECT, or a
+    read and bulk_create on databases without a way to generate UUIDs in SQL.
+    """
+    connection = connections[using]
+    opts = ShoppingItem._meta
+    column = {field.name: connection.ops.quote_name(field.column) for field in opts.concrete_fields}
+    shopping_list_field = opts.get_field("shopping_list").target_field
+    source, target = (shopping_list_field.get_db_prep_value(value, connection) for value in (source_id, target_id))
+
+    new_id = NEW_ID_SQL.get(connection.vendor)
+    if new_id is None:
+        items = ShoppingItem.objects.using(using).filter(shopping_list_id=source_id)
+        if unpurchased_only:
+            items = items.filter(purchased=False)
+        rows = items.values_list("name", "purchased", "purchased_at")
+        if reset_purchased:
+            rows = dict.fromkeys((name, False, None) for name, _, _ in rows)
+        return len(ShoppingItem.objects.using(using).bulk_create(
+            [ShoppingItem(shopping_list_id=target_id, name=name, purchased=purchased, purchased_at=purchased_at) for name, purchased, purchased_at in rows]
+        ))
+
+    where, params = [f"{column['shopping_list']} = %s"], [source]
+    if unpurchased_only:
+        where.append(f"{column['purchased']} = %s")
+        params.append(False)
+    if reset_purchased:
+        # Names that were both purchased and not become one unpurchased item.
+        select = f"SELECT {new_id}, {column['name']}, %s, NULL, %s"
+        params = [False, target, *params]
+        group_by = f" GROUP BY {column['name']}"
+    else:
+        select = f"SELECT {new_id}, {column['name']}, {column['purchased']}, {column['purchased_at']}, %s"
+        params = [target, *params]
+        group_by = ""
+
+    sql = (
+        f"INSERT INTO {connection.ops.quote_name(opts.db_table)} "
+        f"({column['id']}, {column['name']}, {column['purchased']}, {column['purchased_at']}, {column['shopping_list']}) "
+        f"{select} FROM {connection.ops.quote_name(opts.db_table)} WHERE {' AND '.join(where)}{group_by}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def duplicate_shopping_list(shopping_list, user, name=None, unpurchased_only=False, reset_purchased=False):
+    """
+    Creates a new list for ``user`` with copies of the items of
+    ``shopping_list``, or only of its unpurchased ones, in one statement.
+    ``reset_purchased`` copies every name once as an unpurchased item.
+    Returns the new list.
+    """
+    using = shopping_list._state.db
+    # INSERT ... SELECT needs the copy on the same shard as the original.
+    copy_id = generate_uuid()
+    while _alias(copy_id) != using:
+        copy_id = generate_uuid()
+
+    with transaction.atomic(using=using):
+        copy = ShoppingList.objects.using(using).create(id=copy_id, name=name or shopping_list.name)
+        copy.members.add(user)
+        _copy_items(shopping_list.id, copy.id, using, unpurchased_only, reset_purchased)
+        touch_shopping_lists([shopping_list.id, copy.id], using)
+    return ShoppingList.objects.using(using).get(id=copy.id)
+
+
+def move_shopping_items(source_id, target_id, item_ids):
+    """
+    Moves the given items of one list to another with a single UPDATE, or a
+    copy and delete when the lists live on different shards. Unpurchased
+    items whose name is already unpurchased on the target stay where they
+    are. Returns the ids moved and ``{"id", "error"}`` for those that
+    weren't.
+    """
+    source_alias, target_alias = _alias(source_id), _alias(target_id)
+    with transaction.atomic(using=source_alias), transaction.atomic(using=target_alias):
+        found = ShoppingItem.objects.using(source_alias).filter(shopping_list_id=source_id, id__in=item_ids).values_list("id", "name", "purchased")
+        found = {item_id: (name, purchased) for item_id, name, purchased in found}
+        taken = set(
+            ShoppingItem.objects.using(target_alias)
+            .filter(shopping_list_id=target_id, purchased=False, name__in={name for name, purchased in found.values() if not purchased})
+            .values_list("name", flat=True)
+        )
+        moved = [item_id for item_id, (name, purchased) in found.items() if purchased or name not in taken]
+        moved_ids = set(moved)
+
+        if source_alias == target_alias:
+            ShoppingItem.objects.using(source_alias).filter(id__in=moved).update(shopping_list_id=target_id)
+            touch_shopping_lists([source_id, target_id], source_alias)
+        else:
+            items = list(ShoppingItem.objects.using(source_alias).filter(id__in=moved))
+            for item in items:
+                item.shopping_list_id = target_id
+            ShoppingItem.objects.using(target_alias).bulk_create(items)
+            ShoppingItem.objects.using(source_alias).filter(id__in=moved).delete()
+            touch_shopping_lists([source_id], source_alias)
+            touch_shopping_lists([target_id], target_alias)
+
+    errors = [
+        {"id": str(item_id), "error": "duplicate" if item_id in found else "not_found"}
+        for item_id in item_ids
+        if item_id not in moved_ids
+    ]
+    return moved, errors
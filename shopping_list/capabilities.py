@@ -0,0 +1,111 @@
+import base64
+import heapq
+import secrets
+import uuid
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from shopping_list.models import Membership
+from shopping_list.routers import shard_databases
+
+SALT = "shopping_list.capability"
+
+
+@dataclass(frozen=True)
+class Capability:
+    """
+    The shopping lists a capability token was issued for. ``complete`` is
+    False when the user is a member of more lists than fit in a token.
+    """
+
+    user_id: int
+    epoch: str
+    shopping_list_ids: frozenset
+    complete: bool
+
+    def allows(self, shopping_list_id):
+        """
+        True or False when the token decides membership of the shopping
+        list, None when only the database can.
+        """
+        if shopping_list_id in self.shopping_list_ids:
+            return True
+        return False if self.complete else None
+
+
+def _epoch_key(user_id):
+    return f"shopping_list:membership-epoch:{user_id}"
+
+
+def membership_epoch(user_id):
+    """
+    The user's current membership epoch, or None when it expired and every
+    token issued with it has expired too.
+    """
+    return cache.get(_epoch_key(user_id))
+
+
+def bump_membership_epochs(user_ids):
+    """
+    Invalidates every capability token of the given users. Epochs are random
+    rather than counters so one that was evicted can't come back.
+    """
+    timeout = settings.SHOPPING_LIST_CAPABILITY_TOKEN_MAX_AGE
+    cache.set_many({_epoch_key(user_id): secrets.token_hex(4) for user_id in set(user_ids)}, timeout)
+
+
+def _current_epoch(user_id):
+    key = _epoch_key(user_id)
+    timeout = settings.SHOPPING_LIST_CAPABILITY_TOKEN_MAX_AGE
+    cache.add(key, secrets.token_hex(4), timeout)
+    epoch = cache.get(key)
+    # Lives at least as long as the token about to be issued with it.
+    cache.touch(key, timeout)
+    return epoch
+
+
+def issue_capability_token(user):
+    """
+    Signs the user and their most recently used shopping lists, read from
+    the primary so a list just joined is never missing.
+    """
+    # Read before the memberships, so a change in between leaves the token
+    # stale rather than wrong.
+    epoch = _current_epoch(user.pk)
+    limit = settings.SHOPPING_LIST_CAPABILITY_MAX_LISTS
+    memberships = heapq.merge(
+        *(
+            Membership.objects.using(alias)
+            .filter(user=user, shoppinglist__deleted_at__isnull=True)
+            .order_by("-last_interaction")
+            .values_list("last_interaction", "shoppinglist_id")[:limit + 1]
+            for alias in shard_databases()
+        ),
+        reverse=True,
+    )
+    shopping_list_ids = [shopping_list_id for _, shopping_list_id in memberships][:limit + 1]
+
+    payload = {
+        "u": user.pk,
+        "a": [user.is_superuser, user.is_staff],
+        "e": epoch,
+        "l": base64.urlsafe_b64encode(b"".join(shopping_list_id.bytes for shopping_list_id in shopping_list_ids[:limit])).decode(),
+        "c": len(shopping_list_ids) <= limit,
+    }
+    token = signing.dumps(payload, salt=SALT, compress=True)
+    return {"token": token, "expires_in": settings.SHOPPING_LIST_CAPABILITY_TOKEN_MAX_AGE}
+
+
+def load_capability_token(token):
+    """
+    Returns the payload of a token and its Capability. Raises
+    signing.BadSignature for forged or expired tokens. Doesn't check the
+    epoch.
+    """
+    payload = signing.loads(token, salt=SALT, max_age=settings.SHOPPING_LIST_CAPABILITY_TOKEN_MAX_AGE)
+    packed = base64.urlsafe_b64decode(payload["l"])
+    shopping_list_ids = frozenset(uuid.UUID(bytes=packed[start:start + 16]) for start in range(0, len(packed), 16))
+    return payload, Capability(payload["u"], payload["e"], shopping_list_ids, payload["c"])
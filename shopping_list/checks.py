@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core import checks
+
+# Cache backends that keep their data in the process, so a worker never sees
+# what another one stored.
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Capability token revocation and read-your-writes pinning are stored in
+    the default cache and only work when every worker shares it.
+    """
+    features = []
+    if settings.SHOPPING_LIST_CAPABILITY_TOKENS:
+        features.append("SHOPPING_LIST_CAPABILITY_TOKENS")
+    if settings.SHOPPING_LIST_DATABASE_REPLICAS:
+        features.append("SHOPPING_LIST_DATABASE_REPLICAS")
+    backend = settings.CACHES["default"]["BACKEND"]
+    if not features or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        checks.Error(
+            f"{' and '.join(features)} need a cache shared between processes, but the default cache is {backend}.",
+            hint="Configure a shared default cache, e.g. Redis or Memcached, or turn these settings off.",
+            id="shopping_list.E001",
+        )
+    ]
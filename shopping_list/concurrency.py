@@ -0,0 +1,92 @@
+import threading
+import time
+
+from django.conf import settings
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Concurrency limit for one URL name, adjusted by AIMD on latency.
+
+    ``baseline`` is a long-window moving average of the latency, about the
+    last hundred requests, and ``recent`` a short-window one, about the last
+    ten, so single slow requests of a healthy view don't count as queueing.
+    When ``recent`` exceeds ``tolerance`` times the baseline, or a request
+    failed, the limit is cut by ``backoff`` at most once per latency period;
+    every other request grows it by ``1 / limit``, i.e. by one per limit's
+    worth of completions.
+    """
+
+    BASELINE_WEIGHT = 0.01
+    RECENT_WEIGHT = 0.1
+
+    def __init__(self, initial, minimum, maximum, tolerance, backoff):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.in_flight = 0
+        self.baseline = None
+        self.recent = None
+        self.last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, share=1.0):
+        """
+        Admits a request while fewer than ``share`` of the limit are in
+        flight, so lower priorities are shed first.
+        """
+        with self._lock:
+            if self.in_flight >= max(1.0, self.limit * share):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency, failed=False):
+        with self._lock:
+            self.in_flight -= 1
+            if self.baseline is None:
+                self.baseline = self.recent = latency
+            else:
+                self.baseline += (latency - self.baseline) * self.BASELINE_WEIGHT
+                self.recent += (latency - self.recent) * self.RECENT_WEIGHT
+
+            if failed or self.recent > self.baseline * self.tolerance:
+                now = time.monotonic()
+                if now - self.last_decrease >= latency:
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+
+class ConcurrencyLimits:
+    """
+    Process-local limits keyed by URL name, created on first use from the
+    ``SHOPPING_LIST_LOAD_SHEDDING_*`` settings.
+    """
+
+    def __init__(self):
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def get(self, url_name):
+        limit = self._limits.get(url_name)
+        if limit is None:
+            with self._lock:
+                limit = self._limits.setdefault(url_name, AdaptiveConcurrencyLimit(
+                    initial=settings.SHOPPING_LIST_LOAD_SHEDDING_INITIAL_LIMIT,
+                    minimum=settings.SHOPPING_LIST_LOAD_SHEDDING_MIN_LIMIT,
+                    maximum=settings.SHOPPING_LIST_LOAD_SHEDDING_MAX_LIMIT,
+                    tolerance=settings.SHOPPING_LIST_LOAD_SHEDDING_LATENCY_TOLERANCE,
+                    backoff=settings.SHOPPING_LIST_LOAD_SHEDDING_BACKOFF,
+                ))
+        return limit
+
+    def clear(self):
+        with self._lock:
+            self._limits.clear()
+
+
+concurrency_limits = ConcurrencyLimits()
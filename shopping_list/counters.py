@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from shopping_list.models import Membership, ShoppingItem, ShoppingList
+from shopping_list.outbox import record_events
+
+
+def unpurchased_preview(shopping_list_id, using):
+    return list(
+        ShoppingItem.objects.using(using)
+        .filter(shopping_list_id=shopping_list_id, purchased=False)
+        .values_list("name", flat=True)[:settings.SHOPPING_LIST_PREVIEW_SIZE]
+    )
+
+
+def update_shopping_list(shopping_list_id, using, items=0, unpurchased=0, refresh_preview=False, touch=True):
+    """
+    Applies item count deltas to a shopping list in a single UPDATE,
+    optionally re-reading the unpurchased preview and bumping
+    last_interaction.
+    """
+    changes = {}
+    if touch:
+        changes["last_interaction"] = timezone.now()
+    if items:
+        changes["item_count"] = F("item_count") + items
+    if unpurchased:
+        changes["unpurchased_count"] = F("unpurchased_count") + unpurchased
+    if refresh_preview:
+        changes["unpurchased_preview"] = unpurchased_preview(shopping_list_id, using)
+
+    if changes:
+        ShoppingList.all_objects.using(using).filter(id=shopping_list_id).update(**changes)
+    if touch:
+        Membership.objects.using(using).filter(shoppinglist_id=shopping_list_id).update(last_interaction=changes["last_interaction"])
+
+
+def item_saving(item, using):
+    """
+    Re-reads the stored name and purchased flag of an item about to be
+    updated, locking the row inside a transaction, so concurrent updates
+    from stale instances don't apply the same delta twice.
+    """
+    items = ShoppingItem.objects.using(using).filter(id=item.id)
+    if transaction.get_connection(using).in_atomic_block:
+        items = items.select_for_update()
+    item._stored_values = items.values("name", "purchased").first()
+
+
+def item_saved(item, created, using):
+    if created:
+        update_shopping_list(item.shopping_list_id, using, items=1, unpurchased=0 if item.purchased else 1, refresh_preview=not item.purchased)
+        return
+
+    stored = getattr(item, "_stored_values", None)
+    if stored is None:
+        refresh_counters([item.shopping_list_id], using)
+        update_shopping_list(item.shopping_list_id, using)
+        return
+
+    unpurchased = 0
+    if stored["purchased"] != item.purchased:
+        unpurchased = 1 if stored["purchased"] else -1
+    renamed = stored["name"] != item.name and not item.purchased
+    update_shopping_list(item.shopping_list_id, using, unpurchased=unpurchased, refresh_preview=bool(unpurchased) or renamed)
+
+
+def item_deleted(item, using):
+    update_shopping_list(item.shopping_list_id, using, items=-1, unpurchased=0 if item.purchased else -1, refresh_preview=not item.purchased)
+
+
+def refresh_counters(shopping_list_ids, using):
+    """
+    Recomputes the counters and preview of the given shopping lists from
+    their items. Used after bulk operations and by the repair command.
+    """
+    shopping_lists = (
+        ShoppingList.all_objects.using(using)
+        .filter(id__in=shopping_list_ids)
+        .annotate(items=Count("shopping_items"), unpurchased=Count("shopping_items", filter=Q(shopping_items__purchased=False)))
+    )
+    updated = []
+    for shopping_list in shopping_lists:
+        shopping_list.item_count = shopping_list.items
+        shopping_list.unpurchased_count = shopping_list.unpurchased
+        shopping_list.unpurchased_preview = unpurchased_preview(shopping_list.id, using)
+        updated.append(shopping_list)
+
+    ShoppingList.all_objects.using(using).bulk_update(updated, ["item_count", "unpurchased_count", "unpurchased_preview"])
+    return len(updated)
+
+
+def touch_shopping_lists(shopping_list_ids, using, batch_size=500):
+    """
+    Refreshes the counters of shopping lists written to in bulk, bumps their
+    and their memberships' last_interaction and records one
+    ``shopping_list.items_changed`` event per list, ``batch_size`` lists per
+    transaction.
+    """
+    shopping_list_ids = list(shopping_list_ids)
+    now = timezone.now()
+    for start in range(0, len(shopping_list_ids), batch_size):
+        chunk = shopping_list_ids[start:start + batch_size]
+        with transaction.atomic(using=using):
+            refresh_counters(chunk, using)
+            ShoppingList.all_objects.using(using).filter(id__in=chunk).update(last_interaction=now)
+            Membership.objects.using(using).filter(shoppinglist_id__in=chunk).update(last_interaction=now)
+            record_events(using, [("shopping_list.items_changed", {"id": str(shopping_list_id)}) for shopping_list_id in chunk])
@@ -0,0 +1,24 @@
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    """
+    Runs ``PRAGMA name = value`` for each configured pragma. ``busy_timeout``
+    is applied first so the journal mode switch itself waits for locks.
+    """
+    for name in sorted(pragmas, key=lambda name: name != "busy_timeout"):
+        cursor.execute(f"PRAGMA {name} = {pragmas[name]}")
+
+
+@contextmanager
+def execute_wrapper(wrapper):
+    """
+    ``connection.execute_wrapper`` on every database alias, so queries
+    routed to shards and replicas are seen too.
+    """
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(wrapper))
+        yield
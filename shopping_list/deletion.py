@@ -0,0 +1,106 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from shopping_list.capabilities import bump_membership_epochs
+from shopping_list.counters import item_deleted
+from shopping_list.models import ArchivedShoppingItem, Membership, ShoppingItem, ShoppingList
+from shopping_list.outbox import record_event, record_events, shopping_item_payload
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def delete_shopping_item(item):
+    """
+    Deletes an item and updates its list in the same transaction. Does
+    nothing when the item is already gone.
+    """
+    using = item._state.db
+    payload = shopping_item_payload(item)
+    with transaction.atomic(using=using):
+        # The counters go by the stored row, not a possibly stale instance.
+        purchased = ShoppingItem.objects.using(using).select_for_update().filter(id=item.id).values_list("purchased", flat=True).first()
+        if purchased is None:
+            return
+        item.purchased = purchased
+        if item.delete()[0]:
+            item_deleted(item, using)
+            record_event(using, "shopping_item.deleted", payload)
+
+
+def delete_shopping_list(shopping_list):
+    """
+    Hides the shopping list from every queryset right away and purges its
+    rows after the transaction commits.
+    """
+    using = shopping_list._state.db
+    ShoppingList.all_objects.using(using).filter(id=shopping_list.id).update(deleted_at=timezone.now())
+    record_event(using, "shopping_list.deleted", {"id": str(shopping_list.id)})
+    bump_membership_epochs(Membership.objects.using(using).filter(shoppinglist_id=shopping_list.id).values_list("user_id", flat=True))
+
+    if settings.SHOPPING_LIST_PURGE_IN_BACKGROUND:
+        transaction.on_commit(lambda: _submit_purge(shopping_list.id, using), using=using)
+
+
+def delete_shopping_lists(queryset):
+    """
+    delete_shopping_list for every list in ``queryset`` with a single UPDATE.
+    """
+    using = queryset.db
+    shopping_list_ids = list(queryset.values_list("id", flat=True))
+    ShoppingList.all_objects.using(using).filter(id__in=shopping_list_ids).update(deleted_at=timezone.now())
+    record_events(using, [("shopping_list.deleted", {"id": str(shopping_list_id)}) for shopping_list_id in shopping_list_ids])
+    bump_membership_epochs(Membership.objects.using(using).filter(shoppinglist_id__in=shopping_list_ids).values_list("user_id", flat=True))
+
+    if settings.SHOPPING_LIST_PURGE_IN_BACKGROUND:
+        def submit_purges():
+            for shopping_list_id in shopping_list_ids:
+                _submit_purge(shopping_list_id, using)
+
+        transaction.on_commit(submit_purges, using=using)
+
+
+def purge_shopping_list(shopping_list_id, using, batch_size=None):
+    """
+    Deletes a deleted shopping list's items in chunks of ``batch_size`` raw
+    DELETEs, then the list and its memberships. Returns the number of items
+    removed.
+    """
+    batch_size = batch_size or settings.SHOPPING_LIST_PURGE_BATCH_SIZE
+
+    purged = 0
+    for model in (ShoppingItem, ArchivedShoppingItem):
+        while True:
+            ids = list(model.objects.using(using).filter(shopping_list_id=shopping_list_id).values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            # Neither item model has delete signals or reverse relations, so
+            # this is a single DELETE without loading the rows.
+            purged += model.objects.using(using).filter(id__in=ids).delete()[0]
+
+    Membership.objects.using(using).filter(shoppinglist_id=shopping_list_id).delete()
+    ShoppingList.all_objects.using(using).filter(id=shopping_list_id, deleted_at__isnull=False).delete()
+
+    return purged
+
+
+def _purge_in_background(shopping_list_id, using):
+    close_old_connections()
+    try:
+        purge_shopping_list(shopping_list_id, using)
+    except Exception:
+        logger.exception("Purging shopping list %s failed, run purge_deleted_shopping_lists to retry", shopping_list_id)
+    finally:
+        close_old_connections()
+
+
+def _submit_purge(shopping_list_id, using):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shopping-list-purge")
+    _executor.submit(_purge_in_background, shopping_list_id, using)
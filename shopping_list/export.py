@@ -0,0 +1,63 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from shopping_list.models import ArchivedShoppingItem, Membership, ShoppingItem, ShoppingList
+from shopping_list.routers import shard_databases
+
+FORMATS = ("ndjson", "csv")
+
+# Every record type shares one set of columns so the CSV has a single header.
+FIELDS = ["type", "id", "shopping_list", "name", "purchased", "purchased_at", "archived", "user", "last_interaction"]
+
+
+def export_records(user, chunk_size=None):
+    """
+    Yields the user's shopping lists, their memberships and items as dicts.
+    Each record type is one streamed query per shard, so memory does not grow
+    with the size of the account.
+    """
+    chunk_size = chunk_size or settings.SHOPPING_LIST_EXPORT_CHUNK_SIZE
+    for using in shard_databases():
+        shopping_lists = ShoppingList.objects.using(using).filter(memberships__user=user).order_by("id")
+        for record in shopping_lists.values("id", "name", "last_interaction").iterator(chunk_size=chunk_size):
+            yield {"type": "shopping_list", **record}
+
+        memberships = Membership.objects.using(using).filter(
+            shoppinglist__memberships__user=user, shoppinglist__deleted_at__isnull=True
+        ).order_by("shoppinglist_id", "user_id")
+        for shopping_list_id, username in memberships.values_list("shoppinglist_id", "user__username").iterator(chunk_size=chunk_size):
+            yield {"type": "membership", "shopping_list": shopping_list_id, "user": username}
+
+        for model, archived in ((ShoppingItem, False), (ArchivedShoppingItem, True)):
+            items = model.objects.using(using).filter(
+                shopping_list__memberships__user=user, shopping_list__deleted_at__isnull=True
+            ).order_by("shopping_list_id", "id")
+            values = items.values("id", "shopping_list_id", "name", "purchased", "purchased_at")
+            for record in values.iterator(chunk_size=chunk_size):
+                record["shopping_list"] = record.pop("shopping_list_id")
+                yield {"type": "shopping_item", "archived": archived, **record}
+
+
+def to_ndjson(records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder) + "\n"
+
+
+class _Line:
+    def write(self, value):
+        return value
+
+
+def to_csv(records):
+    writer = csv.DictWriter(_Line(), fieldnames=FIELDS)
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+def export_lines(user, export_format, chunk_size=None):
+    encode = to_csv if export_format == "csv" else to_ndjson
+    return encode(export_records(user, chunk_size))
@@ -0,0 +1,44 @@
+import uuid
+
+from django.db import models
+
+
+class CompactUUIDField(models.UUIDField):
+    """
+    UUIDField stored as a 16-byte blob on SQLite instead of 32 characters of
+    hex text. Other databases keep Django's native UUID storage. Python
+    values are ``uuid.UUID`` either way.
+    """
+
+    def get_internal_type(self):
+        # A distinct type keeps SQLite's text-to-UUID converter away from the
+        # blobs; conversion happens in from_db_value instead.
+        return "CompactUUIDField"
+
+    def db_type(self, connection):
+        if connection.vendor == "sqlite":
+            return "blob"
+        return connection.data_types["UUIDField"]
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = self.to_python(value)
+        if connection.vendor == "sqlite":
+            return value.bytes
+        return super().get_db_prep_value(value, connection, prepared)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        if isinstance(value, bytes):
+            return uuid.UUID(bytes=value)
+        return uuid.UUID(value)
+
+    def to_python(self, value):
+        # Raw blobs reach here from extra selects that skip from_db_value,
+        # e.g. the join column of a many-to-many prefetch.
+        if isinstance(value, bytes) and len(value) == 16:
+            return uuid.UUID(bytes=value)
+        return super().to_python(value)
@@ -0,0 +1,213 @@
+import csv
+import json
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from shopping_list.api.serializers import DUPLICATE_ITEM, ShoppingItemSerializer, ShoppingListSerializer
+from shopping_list.counters import touch_shopping_lists
+from shopping_list.models import Membership, ShoppingItem, ShoppingList
+from shopping_list.routers import shard_for
+
+FORMATS = ("csv", "ndjson")
+
+
+def read_rows(lines, import_format):
+    """
+    Yields ``(row number, row)`` from an iterable of text lines one at a time.
+    ``row`` is None for NDJSON lines that are not a JSON object.
+    """
+    if import_format == "csv":
+        yield from enumerate(csv.DictReader(lines), start=1)
+        return
+
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def _alias(shopping_list_id):
+    return shard_for(shopping_list_id) or DEFAULT_DB_ALIAS
+
+
+class ShoppingListImporter:
+    """
+    Creates shopping lists and items for ``user`` from rows in the export
+    format. ``shopping_list`` rows create a list; ``shopping_item`` rows, or
+    rows without a type, add an item to the list named by their
+    ``shopping_list`` column: an id from an earlier list row, the id of a list
+    the user is a member of, or the name of a new list. Other rows are
+    skipped.
+
+    Items are validated with the API serializers a batch at a time and
+    inserted with one bulk_create per shard and batch, each in its own
+    transaction. Counters and last_interaction of every list written to are
+    updated once at the end. Only the first ``max_errors`` row errors are kept
+    in the report; pass ``on_error`` to see every one as it happens.
+    """
+
+    def __init__(self, user, batch_size=None, max_errors=100, on_error=None):
+        self.user = user
+        self.on_error = on_error
+        self.batch_size = batch_size or settings.SHOPPING_LIST_IMPORT_BATCH_SIZE
+        self.max_errors = max_errors
+        self.shopping_lists = {}
+        self.touched = defaultdict(set)
+        self.created_shopping_lists = 0
+        self.created_items = 0
+        self.error_count = 0
+        self.errors = []
+
+    def run(self, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+
+        self._touch_shopping_lists()
+        return {
+            "created_shopping_lists": self.created_shopping_lists,
+            "created_items": self.created_items,
+            "error_count": self.error_count,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+        }
+
+    def _error(self, number, errors):
+        self.error_count += 1
+        if self.on_error is not None:
+            self.on_error(number, errors)
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": number, "errors": errors})
+
+    def _import_batch(self, batch):
+        candidates = []
+        for number, row in batch:
+            if row is None:
+                self._error(number, {"non_field_errors": ["Expected a JSON object."]})
+                continue
+
+            row_type = row.get("type") or "shopping_item"
+            if row_type == "shopping_list":
+                self._import_shopping_list(number, row)
+            elif row_type == "shopping_item":
+                self._validate_item(number, row, candidates)
+
+        items_by_alias = defaultdict(list)
+        for number, shopping_list_id, alias, item in self._drop_duplicates(candidates):
+            items_by_alias[alias].append(item)
+            self.touched[alias].add(shopping_list_id)
+
+        for alias, items in items_by_alias.items():
+            # bulk_create skips the item receivers; counters are refreshed
+            # in _touch_shopping_lists.
+            with transaction.atomic(using=alias):
+                ShoppingItem.objects.using(alias).bulk_create(items)
+            self.created_items += len(items)
+
+    def _import_shopping_list(self, number, row):
+        shopping_list, errors = self._create_shopping_list(row.get("name"))
+        if errors:
+            self._error(number, errors)
+            return
+        self.shopping_lists[str(row.get("id") or row["name"])] = (shopping_list, None)
+
+    def _validate_item(self, number, row, candidates):
+        shopping_list, errors = self._resolve(row.get("shopping_list"))
+        if errors:
+            self._error(number, errors)
+            return
+
+        serializer = ShoppingItemSerializer(data={"name": row.get("name"), "purchased": row.get("purchased") or False})
+        if not serializer.is_valid():
+            self._error(number, serializer.errors)
+            return
+
+        shopping_list_id, alias = shopping_list
+        purchased = serializer.validated_data.get("purchased", False)
+        item = ShoppingItem(
+            shopping_list_id=shopping_list_id,
+            name=serializer.validated_data["name"],
+            purchased=purchased,
+            purchased_at=timezone.now() if purchased else None,
+        )
+        candidates.append((number, shopping_list_id, alias, item))
+
+    def _drop_duplicates(self, candidates):
+        """
+        Applies the unpurchased-duplicate rule of ShoppingItemSerializer
+        against the database and within the batch, one query per shard.
+        """
+        unpurchased = defaultdict(set)
+        for number, shopping_list_id, alias, item in candidates:
+            if not item.purchased:
+                unpurchased[alias].add((shopping_list_id, item.name))
+
+        existing = set()
+        for alias, keys in unpurchased.items():
+            existing.update(
+                ShoppingItem.objects.using(alias)
+                .filter(shopping_list_id__in={key[0] for key in keys}, name__in={key[1] for key in keys}, purchased=False)
+                .values_list("shopping_list_id", "name")
+            )
+
+        for number, shopping_list_id, alias, item in candidates:
+            if not item.purchased:
+                key = (shopping_list_id, item.name)
+                if key in existing:
+                    self._error(number, {"name": [DUPLICATE_ITEM]})
+                    continue
+                existing.add(key)
+            yield number, shopping_list_id, alias, item
+
+    def _resolve(self, reference):
+        if not reference:
+            return None, {"shopping_list": ["This field is required."]}
+        reference = str(reference)
+        if reference not in self.shopping_lists:
+            self.shopping_lists[reference] = self._lookup(reference)
+        return self.shopping_lists[reference]
+
+    def _lookup(self, reference):
+        try:
+            shopping_list_id = uuid.UUID(reference)
+        except ValueError:
+            return self._create_shopping_list(reference)
+
+        alias = _alias(shopping_list_id)
+        if self.user.is_superuser:
+            found = ShoppingList.objects.using(alias).filter(id=shopping_list_id).exists()
+        else:
+            found = Membership.objects.using(alias).filter(
+                shoppinglist_id=shopping_list_id, shoppinglist__deleted_at__isnull=True, user=self.user
+            ).exists()
+        if not found:
+            return None, {"shopping_list": ["Not found."]}
+        return (shopping_list_id, alias), None
+
+    def _create_shopping_list(self, name):
+        serializer = ShoppingListSerializer(data={"name": name})
+        if not serializer.is_valid():
+            return None, serializer.errors
+
+        shopping_list = ShoppingList.objects.create(name=serializer.validated_data["name"])
+        shopping_list.members.add(self.user)
+        self.created_shopping_lists += 1
+        return (shopping_list.id, shopping_list._state.db), None
+
+    def _touch_shopping_lists(self):
+        for alias, shopping_list_ids in self.touched.items():
+            touch_shopping_lists(shopping_list_ids, alias, self.batch_size)
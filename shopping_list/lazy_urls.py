@@ -0,0 +1,10 @@
+from django.urls import URLResolver
+from django.urls.resolvers import RoutePattern
+
+
+def lazy_include(route, urlconf, namespace=None):
+    """
+    Like ``path(route, include(urlconf))``, but the URLconf module is only
+    imported when a URL under ``route`` is first resolved or reversed.
+    """
+    return URLResolver(RoutePattern(route, is_endpoint=False), urlconf, app_name=namespace, namespace=namespace)
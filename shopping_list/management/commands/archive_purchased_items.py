@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from shopping_list.archive import archive_purchased_items
+from shopping_list.routers import shard_databases
+
+
+class Command(BaseCommand):
+    help = "Moves purchased items older than SHOPPING_LIST_ARCHIVE_AFTER_DAYS into the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.SHOPPING_LIST_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=settings.SHOPPING_LIST_ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(days=options["days"])
+        for using in shard_databases():
+            archived = archive_purchased_items(using=using, older_than=older_than, batch_size=options["batch_size"])
+            self.stdout.write(f"Archived {archived} purchased items on {using}")
@@ -0,0 +1,129 @@
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shopping_list.db import apply_sqlite_pragmas
+
+SCHEMA = [
+    "CREATE TABLE shopping_list_shoppinglist (id char(32) PRIMARY KEY, name varchar(200) NOT NULL, last_interaction datetime NOT NULL)",
+    "CREATE TABLE shopping_list_shoppingitem (id char(32) PRIMARY KEY, name varchar(100) NOT NULL, purchased bool NOT NULL, shopping_list_id char(32) NOT NULL REFERENCES shopping_list_shoppinglist (id))",
+    "CREATE INDEX shopping_list_shoppingitem_shopping_list_id ON shopping_list_shoppingitem (shopping_list_id)",
+]
+
+PROFILES = {
+    # Django defaults before tuning: a new connection per request, rollback
+    # journal, sqlite3's default lock wait and deferred transactions.
+    "default": {"pragmas": {}, "persistent": False, "transaction_mode": "DEFERRED"},
+    # Tuned pragmas, but transactions that read before they write can't be
+    # retried by busy_timeout when another connection commits in between.
+    "wal": {"pragmas": None, "persistent": True, "transaction_mode": "DEFERRED"},
+    "tuned": {"pragmas": None, "persistent": True, "transaction_mode": None},
+}
+
+
+def _connect(path, pragmas):
+    connection = sqlite3.connect(path, isolation_level=None)
+    apply_sqlite_pragmas(connection, pragmas)
+    return connection
+
+
+def _add_item(connection, shopping_list_id, transaction_mode):
+    # Mirrors an item POST, which runs in one atomic block: duplicate check,
+    # insert, then the receiver touching the list's last_interaction.
+    name = f"item-{uuid.uuid4().hex[:8]}"
+    connection.execute(f"BEGIN {transaction_mode}")
+    try:
+        _write_item(connection, shopping_list_id, name)
+    except sqlite3.Error:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def _write_item(connection, shopping_list_id, name):
+    connection.execute(
+        "SELECT 1 FROM shopping_list_shoppingitem WHERE shopping_list_id = ? AND name = ? AND NOT purchased",
+        (shopping_list_id, name),
+    ).fetchone()
+    connection.execute(
+        "INSERT INTO shopping_list_shoppingitem (id, name, purchased, shopping_list_id) VALUES (?, ?, 0, ?)",
+        (uuid.uuid4().hex, name, shopping_list_id),
+    )
+    connection.execute(
+        "UPDATE shopping_list_shoppinglist SET last_interaction = datetime('now') WHERE id = ?",
+        (shopping_list_id,),
+    )
+
+
+def _worker(path, profile, shopping_list_id, duration, results):
+    pragmas = profile["pragmas"]
+    completed = locked = 0
+    connection = _connect(path, pragmas) if profile["persistent"] else None
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        current = connection or _connect(path, pragmas)
+        try:
+            _add_item(current, shopping_list_id, profile["transaction_mode"])
+            completed += 1
+        except sqlite3.OperationalError as error:
+            if "locked" not in str(error):
+                raise
+            locked += 1
+        finally:
+            if connection is None:
+                current.close()
+
+    results.put((completed, locked))
+
+
+class Command(BaseCommand):
+    help = "Measures concurrent item write throughput and lock errors with default and tuned SQLite settings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        for profile in PROFILES.values():
+            if profile["pragmas"] is None:
+                profile["pragmas"] = settings.SHOPPING_LIST_SQLITE_PRAGMAS
+        PROFILES["tuned"]["transaction_mode"] = settings.DATABASES["default"].get("OPTIONS", {}).get("transaction_mode", "DEFERRED")
+
+        for name, profile in PROFILES.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = str(Path(directory) / "benchmark.sqlite3")
+                connection = _connect(path, profile["pragmas"])
+                for statement in SCHEMA:
+                    connection.execute(statement)
+                shopping_list_ids = [uuid.uuid4().hex for _ in range(options["workers"])]
+                connection.executemany(
+                    "INSERT INTO shopping_list_shoppinglist (id, name, last_interaction) VALUES (?, 'Groceries', datetime('now'))",
+                    [(shopping_list_id,) for shopping_list_id in shopping_list_ids],
+                )
+                connection.close()
+
+                results = multiprocessing.Queue()
+                workers = [
+                    multiprocessing.Process(target=_worker, args=(path, profile, shopping_list_id, options["duration"], results))
+                    for shopping_list_id in shopping_list_ids
+                ]
+                for worker in workers:
+                    worker.start()
+                totals = [results.get() for _ in workers]
+                for worker in workers:
+                    worker.join()
+
+            completed = sum(result[0] for result in totals)
+            locked = sum(result[1] for result in totals)
+            attempts = completed + locked
+            self.stdout.write(
+                f"{name:>8}: {completed / options['duration']:8.1f} writes/s, "
+                f"{locked} lock errors ({100 * locked / attempts if attempts else 0:.2f}% of attempts)"
+            )
@@ -0,0 +1,50 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from shopping_list.api.views import ObtainAuthTokenWithRefresh, RefreshAccessToken
+from shopping_list.tokens import issue_refresh_token
+
+
+class Command(BaseCommand):
+    help = "Compares the CPU time of a reconnect through api-token-auth/ with the password against one through api/token-refresh/."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reconnects", type=int, default=20)
+
+    def handle(self, *args, **options):
+        reconnects = options["reconnects"]
+        factory = APIRequestFactory()
+        login_view, refresh_view = ObtainAuthTokenWithRefresh.as_view(), RefreshAccessToken.as_view()
+        # Runs against the configured database and leaves no rows behind.
+        with transaction.atomic():
+            user = get_user_model().objects.create_user("benchmark-token-refresh", password="benchmark-password")
+
+            def login():
+                response = login_view(factory.post("/", {"username": user.username, "password": "benchmark-password"}, format="json"))
+                assert response.status_code == 200, response.data
+
+            refresh_token = issue_refresh_token(user)
+
+            def refresh():
+                nonlocal refresh_token
+                response = refresh_view(factory.post("/", {"refresh_token": refresh_token}, format="json"))
+                assert response.status_code == 200, response.data
+                refresh_token = response.data["refresh_token"]
+
+            results = {name: self.measure(reconnect, reconnects) for name, reconnect in (("password login", login), ("token refresh", refresh))}
+            transaction.set_rollback(True)
+
+        for name, (cpu, wall) in results.items():
+            self.stdout.write(f"{name:<15} {cpu * 1000:8.2f} ms CPU {wall * 1000:8.2f} ms wall per reconnect")
+        self.stdout.write(f"CPU saved per reconnect: {(results['password login'][0] - results['token refresh'][0]) * 1000:.2f} ms")
+
+    def measure(self, reconnect, reconnects):
+        reconnect()
+        cpu, wall = time.process_time(), time.perf_counter()
+        for _ in range(reconnects):
+            reconnect()
+        return (time.process_time() - cpu) / reconnects, (time.perf_counter() - wall) / reconnects
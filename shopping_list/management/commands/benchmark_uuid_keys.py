@@ -0,0 +1,52 @@
+import sqlite3
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shopping_list.db import apply_sqlite_pragmas
+from shopping_list.uuids import uuid7
+
+GENERATORS = {
+    "uuid4": uuid.uuid4,
+    "uuid7": uuid7,
+}
+
+
+class Command(BaseCommand):
+    help = "Compares insert throughput and primary key index size of uuid4 and uuid7 keys in an item-shaped SQLite table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        for name, generate in GENERATORS.items():
+            with tempfile.TemporaryDirectory() as directory:
+                connection = sqlite3.connect(str(Path(directory) / "benchmark.sqlite3"), isolation_level=None)
+                apply_sqlite_pragmas(connection, settings.SHOPPING_LIST_SQLITE_PRAGMAS)
+                # Same layout Django gives ShoppingItem on SQLite: UUIDs as
+                # 32-character hex text with an automatic unique index.
+                connection.execute("CREATE TABLE item (id char(32) NOT NULL PRIMARY KEY, name varchar(100) NOT NULL, purchased bool NOT NULL)")
+
+                elapsed = 0.0
+                for offset in range(0, options["rows"], options["batch_size"]):
+                    rows = [(generate().hex, "Milk", False) for _ in range(min(options["batch_size"], options["rows"] - offset))]
+                    start = time.perf_counter()
+                    connection.execute("BEGIN")
+                    connection.executemany("INSERT INTO item (id, name, purchased) VALUES (?, ?, ?)", rows)
+                    connection.execute("COMMIT")
+                    elapsed += time.perf_counter() - start
+
+                index_bytes, index_pages, leaf_fill = connection.execute(
+                    "SELECT SUM(pgsize), COUNT(*), AVG(CAST(pgsize - unused AS REAL) / pgsize) FROM dbstat WHERE name = 'sqlite_autoindex_item_1'"
+                ).fetchone()
+                connection.close()
+
+            self.stdout.write(
+                f"{name}: {options['rows'] / elapsed:10.0f} inserts/s, "
+                f"primary key index {index_bytes / 1024 / 1024:.1f} MiB in {index_pages} pages, {leaf_fill:.0%} full"
+            )
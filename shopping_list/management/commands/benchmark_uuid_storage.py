@@ -0,0 +1,84 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shopping_list.db import apply_sqlite_pragmas
+
+SCHEMA = [
+    "CREATE TABLE list (id {uuid} NOT NULL PRIMARY KEY, name varchar(200) NOT NULL, last_interaction datetime NOT NULL)",
+    "CREATE TABLE list_members (id integer PRIMARY KEY AUTOINCREMENT, shoppinglist_id {uuid} NOT NULL REFERENCES list (id), user_id bigint NOT NULL)",
+    "CREATE UNIQUE INDEX list_members_unique ON list_members (shoppinglist_id, user_id)",
+    "CREATE INDEX list_members_user ON list_members (user_id)",
+    "CREATE TABLE item (id {uuid} NOT NULL PRIMARY KEY, name varchar(100) NOT NULL, purchased bool NOT NULL, shopping_list_id {uuid} NOT NULL REFERENCES list (id))",
+    "CREATE INDEX item_shopping_list ON item (shopping_list_id)",
+]
+
+# The list index with an item count per list: two joins on UUID columns.
+INDEX_QUERY = """
+    SELECT list.id, list.name, COUNT(item.id)
+    FROM list
+    JOIN list_members ON list_members.shoppinglist_id = list.id
+    LEFT JOIN item ON item.shopping_list_id = list.id AND NOT item.purchased
+    WHERE list_members.user_id = ?
+    GROUP BY list.id
+    ORDER BY list.last_interaction DESC
+"""
+
+STORAGE = {
+    "text": ("char(32)", lambda value: value.hex),
+    "blob": ("blob", lambda value: value.bytes),
+}
+
+
+class Command(BaseCommand):
+    help = "Compares database size and join speed of UUIDs stored as 32-character text and as 16-byte blobs on SQLite."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lists", type=int, default=20_000)
+        parser.add_argument("--items-per-list", type=int, default=25)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--queries", type=int, default=2_000)
+
+    def handle(self, *args, **options):
+        seed = random.random()
+        for name, (column_type, encode) in STORAGE.items():
+            generator = random.Random(seed)
+            with tempfile.TemporaryDirectory() as directory:
+                path = Path(directory) / "benchmark.sqlite3"
+                connection = sqlite3.connect(str(path), isolation_level=None)
+                apply_sqlite_pragmas(connection, settings.SHOPPING_LIST_SQLITE_PRAGMAS)
+                for statement in SCHEMA:
+                    connection.execute(statement.format(uuid=column_type))
+
+                connection.execute("BEGIN")
+                for _ in range(options["lists"]):
+                    shopping_list_id = encode(uuid.UUID(int=generator.getrandbits(128), version=4))
+                    connection.execute("INSERT INTO list VALUES (?, 'Groceries', datetime('now', ?))", (shopping_list_id, f"-{generator.randrange(10000)} minutes"))
+                    connection.execute("INSERT INTO list_members (shoppinglist_id, user_id) VALUES (?, ?)", (shopping_list_id, generator.randrange(options["users"])))
+                    connection.executemany(
+                        "INSERT INTO item VALUES (?, 'Milk', ?, ?)",
+                        [
+                            (encode(uuid.UUID(int=generator.getrandbits(128), version=4)), generator.random() < 0.8, shopping_list_id)
+                            for _ in range(options["items_per_list"])
+                        ],
+                    )
+                connection.execute("COMMIT")
+                connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                connection.execute("VACUUM")
+                size = os.path.getsize(path)
+
+                users = [generator.randrange(options["users"]) for _ in range(options["queries"])]
+                start = time.perf_counter()
+                for user_id in users:
+                    connection.execute(INDEX_QUERY, (user_id,)).fetchall()
+                elapsed = time.perf_counter() - start
+                connection.close()
+
+            self.stdout.write(f"{name}: {size / 1024 / 1024:.1f} MiB database, {options['queries'] / elapsed:.0f} list index queries/s")
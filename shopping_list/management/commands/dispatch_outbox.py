@@ -0,0 +1,36 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shopping_list.outbox import dispatch_pending
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Delivers pending outbox events to their handlers, once or polling until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit when no events are pending.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to wait when idle or after a handler error.")
+        parser.add_argument("--batch-size", type=int, default=settings.SHOPPING_LIST_OUTBOX_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                delivered = dispatch_pending(options["batch_size"])
+            except Exception:
+                if options["once"]:
+                    raise
+                logger.exception("Dispatching outbox events failed, retrying in %s seconds", options["interval"])
+                delivered = 0
+            else:
+                if delivered:
+                    self.stdout.write(f"Delivered {delivered} events")
+
+            if options["once"]:
+                return
+            if not delivered:
+                time.sleep(options["interval"])
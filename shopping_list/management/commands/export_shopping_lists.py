@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from shopping_list.export import FORMATS, export_lines
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Streams a user's shopping lists, memberships and items as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--format", choices=FORMATS, default="ndjson")
+        parser.add_argument("--output", help="File to write, defaults to stdout.")
+        parser.add_argument("--chunk-size", type=int, default=settings.SHOPPING_LIST_EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist.")
+
+        lines = export_lines(user, options["format"], options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from shopping_list.api.schema import code_version, generate_schema, write_schema
+
+
+class Command(BaseCommand):
+    help = "Writes the OpenAPI schema for the current code version to SHOPPING_LIST_SCHEMA_DIR, with gzip variants."
+
+    def handle(self, *args, **options):
+        directory = settings.SHOPPING_LIST_SCHEMA_DIR
+        if not directory:
+            raise CommandError("SHOPPING_LIST_SCHEMA_DIR is not set.")
+
+        version = code_version()
+        write_schema(directory, version, generate_schema())
+        self.stdout.write(f"Wrote schema version {version} to {directory}")
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from shopping_list.imports import FORMATS, ShoppingListImporter, read_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Creates shopping lists and items for a user from a CSV or NDJSON file in the export format."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=settings.SHOPPING_LIST_IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist.")
+
+        import_format = options["format"] or Path(options["path"]).suffix.lstrip(".")
+        if import_format not in FORMATS:
+            raise CommandError("Pass --format csv or --format ndjson.")
+
+        importer = ShoppingListImporter(
+            user, batch_size=options["batch_size"], max_errors=0, on_error=lambda number, errors: self.stderr.write(f"Row {number}: {errors}")
+        )
+        with open(options["path"], newline="", encoding="utf-8-sig") as lines:
+            report = importer.run(read_rows(lines, import_format))
+
+        self.stdout.write(
+            f"Created {report['created_shopping_lists']} shopping lists and {report['created_items']} items, "
+            f"{report['error_count']} rows rejected"
+        )
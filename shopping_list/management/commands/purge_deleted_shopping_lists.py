@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shopping_list.deletion import purge_shopping_list
+from shopping_list.models import ShoppingList
+from shopping_list.routers import shard_databases
+
+
+class Command(BaseCommand):
+    help = "Removes the rows of shopping lists that were deleted through the API."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.SHOPPING_LIST_PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for using in shard_databases():
+            deleted = ShoppingList.all_objects.using(using).filter(deleted_at__isnull=False).values_list("id", flat=True)
+            for shopping_list_id in list(deleted):
+                purged = purge_shopping_list(shopping_list_id, using, batch_size=options["batch_size"])
+                self.stdout.write(f"Purged shopping list {shopping_list_id} with {purged} items on {using}")
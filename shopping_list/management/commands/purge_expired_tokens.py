@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from shopping_list.tokens import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Removes expired access and refresh tokens."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        purged = purge_expired_tokens(batch_size=options["batch_size"])
+        self.stdout.write(f"Purged {purged} expired tokens")
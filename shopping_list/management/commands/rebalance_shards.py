@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from shopping_list.models import ArchivedShoppingItem, Membership, ShoppingItem, ShoppingList
+from shopping_list.routers import shard_for
+
+
+class Command(BaseCommand):
+    help = "Moves shopping lists, their memberships and items to the shard their id hashes to."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sources", nargs="*", help="Aliases to scan, defaults to every shard. Include removed shards here.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if not settings.SHOPPING_LIST_SHARDS:
+            raise CommandError("SHOPPING_LIST_SHARDS is empty.")
+
+        moved = 0
+        for source in options["sources"] or settings.SHOPPING_LIST_SHARDS:
+            misplaced = [
+                shopping_list_id
+                for shopping_list_id in ShoppingList.objects.using(source).values_list("id", flat=True).iterator()
+                if shard_for(shopping_list_id) != source
+            ]
+            for shopping_list_id in misplaced:
+                target = shard_for(shopping_list_id)
+                if not options["dry_run"]:
+                    self.move(shopping_list_id, source, target)
+                moved += 1
+                self.stdout.write(f"{shopping_list_id}: {source} -> {target}")
+
+        self.stdout.write(f"{'Would move' if options['dry_run'] else 'Moved'} {moved} shopping lists")
+
+    def move(self, shopping_list_id, source, target):
+        with transaction.atomic(using=source), transaction.atomic(using=target):
+            shopping_list = ShoppingList.objects.using(source).get(id=shopping_list_id)
+            memberships = list(Membership.objects.using(source).filter(shoppinglist_id=shopping_list_id))
+            items = list(ShoppingItem.objects.using(source).filter(shopping_list_id=shopping_list_id))
+            archived_items = list(ArchivedShoppingItem.objects.using(source).filter(shopping_list_id=shopping_list_id))
+            for membership in memberships:
+                membership.pk = None
+
+            # bulk_create skips post_save, so moving items does not touch the
+            # list; last_interaction is restored because auto_now resets it,
+            # on the memberships too so the list index stays in order.
+            ShoppingList.objects.using(target).bulk_create([shopping_list])
+            ShoppingList.objects.using(target).filter(id=shopping_list_id).update(last_interaction=shopping_list.last_interaction)
+            Membership.objects.using(target).bulk_create(memberships)
+            Membership.objects.using(target).filter(shoppinglist_id=shopping_list_id).update(last_interaction=shopping_list.last_interaction)
+            ShoppingItem.objects.using(target).bulk_create(items, batch_size=500)
+            ArchivedShoppingItem.objects.using(target).bulk_create(archived_items, batch_size=500)
+
+            ShoppingItem.objects.using(source).filter(shopping_list_id=shopping_list_id).delete()
+            ArchivedShoppingItem.objects.using(source).filter(shopping_list_id=shopping_list_id).delete()
+            ShoppingList.objects.using(source).filter(id=shopping_list_id).delete()
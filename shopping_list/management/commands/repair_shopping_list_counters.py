@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from shopping_list.counters import refresh_counters
+from shopping_list.models import ShoppingList
+from shopping_list.routers import shard_databases
+
+
+class Command(BaseCommand):
+    help = "Recomputes the item counters and unpurchased preview stored on every shopping list."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        for using in shard_databases():
+            shopping_list_ids = list(ShoppingList.all_objects.using(using).values_list("id", flat=True))
+            repaired = 0
+            for offset in range(0, len(shopping_list_ids), options["batch_size"]):
+                repaired += refresh_counters(shopping_list_ids[offset:offset + options["batch_size"]], using)
+            self.stdout.write(f"Repaired {repaired} shopping lists on {using}")
@@ -0,0 +1,106 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under -X importtime, going through the same
+# steps as a worker starting up, and prints the phase and ready() timings.
+PROBE = """
+import json, time
+
+from django.apps import AppConfig
+
+ready_times = {}
+create = AppConfig.create.__func__
+
+
+def timed_create(cls, entry):
+    app_config = create(cls, entry)
+    ready = app_config.ready
+
+    def timed_ready():
+        started = time.perf_counter()
+        ready()
+        ready_times[app_config.label] = time.perf_counter() - started
+
+    app_config.ready = timed_ready
+    return app_config
+
+
+AppConfig.create = classmethod(timed_create)
+phases = {}
+
+
+def phase(name, function):
+    started = time.perf_counter()
+    result = function()
+    phases[name] = time.perf_counter() - started
+    return result
+
+
+import django
+
+phase("django.setup", django.setup)
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import get_resolver
+from shopping_list.warmup import warm_up
+
+phase("middleware", WSGIHandler)
+phase("urlconf", lambda: get_resolver().url_patterns)
+phase("warm_up", warm_up)
+print(json.dumps({"phases": phases, "ready": ready_times}))
+"""
+
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+class Command(BaseCommand):
+    help = "Reports where a new process spends its startup time: imports by package, app ready() and first-request work."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=15)
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "core.settings")},
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        by_package = Counter()
+        top_level = []
+        for line in result.stderr.splitlines():
+            match = IMPORT_TIME.match(line)
+            if match is None:
+                continue
+            own, cumulative, indent, module = int(match[1]), int(match[2]), len(match[3]), match[4]
+            by_package[module.split(".")[0]] += own
+            if indent == 1:
+                top_level.append((cumulative, module))
+
+        self.stdout.write("Startup phases:")
+        for name, seconds in report["phases"].items():
+            self.stdout.write(f"  {name:<30} {seconds * 1000:8.1f} ms")
+
+        self.stdout.write("App ready():")
+        for label, seconds in sorted(report["ready"].items(), key=lambda item: -item[1])[:options["limit"]]:
+            self.stdout.write(f"  {label:<30} {seconds * 1000:8.1f} ms")
+
+        self.stdout.write(f"Import time by package, {sum(by_package.values()) / 1000:.1f} ms in total:")
+        for package, microseconds in by_package.most_common(options["limit"]):
+            self.stdout.write(f"  {package:<30} {microseconds / 1000:8.1f} ms")
+
+        self.stdout.write("Slowest imports including their dependencies:")
+        for microseconds, module in sorted(top_level, reverse=True)[:options["limit"]]:
+            self.stdout.write(f"  {module:<30} {microseconds / 1000:8.1f} ms")
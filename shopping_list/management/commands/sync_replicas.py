@@ -0,0 +1,26 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = "Copies the primary SQLite database into every configured read replica. A local stand-in for replication."
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("sync_replicas only supports SQLite databases.")
+
+        source = sqlite3.connect(str(primary["NAME"]))
+        try:
+            for alias in settings.SHOPPING_LIST_DATABASE_REPLICAS:
+                target = sqlite3.connect(str(settings.DATABASES[alias]["NAME"]))
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"Synced {alias}")
+        finally:
+            source.close()
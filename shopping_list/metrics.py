@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    """
+    Per-request accumulator for the phases reported in the Server-Timing
+    header. Phases may overlap, e.g. ``db`` also counts queries issued by
+    permission checks.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.queries = 0
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def count_query(self, execute, sql, params, many, context):
+        """An execute wrapper adding each query to ``queries`` and ``db``."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add("db", time.perf_counter() - start)
+            self.queries += 1
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def header(self):
+        parts = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in self.phases.items() if phase != "db"]
+        parts.append(f'db;desc="{self.queries} queries";dur={self.phases.get("db", 0.0) * 1000:.2f}')
+        parts.append(f"total;dur={self.total() * 1000:.2f}")
+        return ", ".join(parts)
+
+
+def get_request_timings(request):
+    return getattr(request, "_shopping_list_timings", None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def to_dict(self):
+        return {"counts": self.counts, "sum": self.sum}
+
+    def merge(self, data):
+        for index, count in enumerate(data["counts"]):
+            self.counts[index] += count
+        self.sum += data["sum"]
+
+
+class MetricsRegistry:
+    """
+    Process-local latency and query-count histograms keyed by URL name.
+
+    With ``SHOPPING_LIST_METRICS_DIR`` set, every worker process periodically
+    writes its snapshot to its own file in that directory and the metrics
+    endpoint sums all snapshots, so nothing is shared between processes at
+    request time.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self.last_flush = 0.0
+
+    def observe(self, view_name, seconds, queries):
+        with self.lock:
+            self.latency[view_name].observe(seconds)
+            self.queries[view_name].observe(queries)
+            now = time.monotonic()
+            should_flush = now - self.last_flush >= settings.SHOPPING_LIST_METRICS_FLUSH_INTERVAL
+            if should_flush:
+                # Claimed under the lock so only one request thread flushes.
+                self.last_flush = now
+        if should_flush:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "latency": {name: histogram.to_dict() for name, histogram in self.latency.items()},
+                "queries": {name: histogram.to_dict() for name, histogram in self.queries.items()},
+            }
+
+    def flush(self):
+        directory = settings.SHOPPING_LIST_METRICS_DIR
+        if not directory:
+            return
+
+        directory = Path(directory)
+        snapshot = json.dumps(self.snapshot())
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=directory, prefix="metrics-", suffix=".tmp", delete=False) as temporary:
+                temporary.write(snapshot)
+            os.replace(temporary.name, directory / f"metrics-{os.getpid()}.json")
+        except OSError:
+            logger.exception("Writing the metrics snapshot to %s failed", directory)
+
+    def collect(self):
+        snapshots = []
+        directory = settings.SHOPPING_LIST_METRICS_DIR
+        if directory and Path(directory).is_dir():
+            own_file = f"metrics-{os.getpid()}.json"
+            for path in Path(directory).glob("metrics-*.json"):
+                if path.name == own_file:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue
+        snapshots.append(self.snapshot())
+
+        latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        for snapshot in snapshots:
+            for name, data in snapshot["latency"].items():
+                latency[name].merge(data)
+            for name, data in snapshot["queries"].items():
+                queries[name].merge(data)
+
+        return latency, queries
+
+    def reset(self):
+        with self.lock:
+            self.latency.clear()
+            self.queries.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _format_histogram(lines, metric, histograms):
+    for name in sorted(histograms):
+        histogram = histograms[name]
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{view="{name}",le="{bound}"}} {cumulative}')
+        cumulative += histogram.counts[-1]
+        lines.append(f'{metric}_bucket{{view="{name}",le="+Inf"}} {cumulative}')
+        lines.append(f'{metric}_sum{{view="{name}"}} {histogram.sum}')
+        lines.append(f'{metric}_count{{view="{name}"}} {cumulative}')
+
+
+def render_metrics():
+    latency, queries = registry.collect()
+    lines = [
+        "# HELP shopping_list_request_duration_seconds Request latency by URL name.",
+        "# TYPE shopping_list_request_duration_seconds histogram",
+    ]
+    _format_histogram(lines, "shopping_list_request_duration_seconds", latency)
+    lines += [
+        "# HELP shopping_list_request_queries Database queries per request by URL name.",
+        "# TYPE shopping_list_request_queries histogram",
+    ]
+    _format_histogram(lines, "shopping_list_request_queries", queries)
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+
+from shopping_list.concurrency import concurrency_limits
+from shopping_list.db import execute_wrapper
+from shopping_list import metrics
+from shopping_list.metrics import RequestTimings, registry
+from shopping_list.routers import SAFE_METHODS, routing_context
+
+query_logger = logging.getLogger("shopping_list.queries")
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+TESTS_DIR = os.path.join(PACKAGE_DIR, "tests")
+# Modules whose execute wrappers sit between a query and the code issuing it.
+WRAPPER_FILES = {__file__, metrics.__file__}
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header to every response and records per-URL-name
+    latency and query-count histograms for the metrics endpoint.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        request._shopping_list_timings = timings
+
+        with execute_wrapper(timings.count_query):
+            response = self.get_response(request)
+
+        response["Server-Timing"] = timings.header()
+
+        resolver_match = getattr(request, "resolver_match", None)
+        if resolver_match is not None and resolver_match.url_name:
+            registry.observe(resolver_match.url_name, timings.total(), timings.queries)
+
+        return response
+
+
+class LoadSheddingMiddleware:
+    """
+    Holds each URL name to an adaptive concurrency limit and answers requests
+    over it with 503 and Retry-After instead of letting them queue.
+
+    Writes may use the whole limit, authenticated reads
+    ``SHOPPING_LIST_LOAD_SHEDDING_PRIORITY_SHARES["user"]`` of it and
+    anonymous traffic and the schema and docs only the ``"background"``
+    share, so they are shed first.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SHOPPING_LIST_LOAD_SHEDDING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Exceptions raised by views reach here as 500 responses.
+        response = self.get_response(request)
+        admitted = getattr(request, "_shopping_list_admitted", None)
+        if admitted is not None:
+            limit, started = admitted
+            limit.release(time.perf_counter() - started, failed=response.status_code >= 500)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        url_name = request.resolver_match.url_name
+        if not url_name:
+            return None
+
+        limit = concurrency_limits.get(url_name)
+        if not limit.try_acquire(settings.SHOPPING_LIST_LOAD_SHEDDING_PRIORITY_SHARES[self.priority(request, url_name)]):
+            response = JsonResponse({"detail": "Too many requests in progress, try again shortly."}, status=503)
+            response["Retry-After"] = str(settings.SHOPPING_LIST_LOAD_SHEDDING_RETRY_AFTER)
+            return response
+
+        request._shopping_list_admitted = (limit, time.perf_counter())
+        return None
+
+    def priority(self, request, url_name):
+        if url_name in ("schema", "swagger_ui"):
+            return "background"
+        if request.method not in SAFE_METHODS:
+            return "write"
+        # Token authentication runs inside the view, so an Authorization
+        # header counts as authenticated here. A forged one only buys
+        # priority, never access.
+        if "Authorization" in request.headers or request.user.is_authenticated:
+            return "user"
+        return "background"
+
+
+class QueryInspectionError(Exception):
+    pass
+
+
+def _calling_frame():
+    """
+    Innermost stack frame inside the shopping_list package, skipping the
+    execute wrappers and the test suite.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PACKAGE_DIR) and filename not in WRAPPER_FILES and not filename.startswith(TESTS_DIR):
+            return f"{os.path.relpath(filename, os.path.dirname(PACKAGE_DIR))}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class QueryInspectorMiddleware:
+    """
+    Reports queries slower than ``SHOPPING_LIST_SLOW_QUERY_THRESHOLD`` seconds
+    and identical SQL issued ``SHOPPING_LIST_DUPLICATE_QUERY_THRESHOLD`` or
+    more times within one request, together with the shopping_list code that
+    issued them. In strict mode the request fails instead.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SHOPPING_LIST_QUERY_INSPECTOR:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.slow_threshold = settings.SHOPPING_LIST_SLOW_QUERY_THRESHOLD
+        self.duplicate_threshold = settings.SHOPPING_LIST_DUPLICATE_QUERY_THRESHOLD
+        self.strict = settings.SHOPPING_LIST_QUERY_INSPECTOR_STRICT
+
+    def __call__(self, request):
+        slow_queries = []
+        executions = defaultdict(list)
+
+        def inspect_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = time.perf_counter() - start
+                origin = _calling_frame()
+                executions[sql].append(origin)
+                if duration >= self.slow_threshold:
+                    slow_queries.append({"sql": sql, "duration": round(duration, 6), "origin": origin})
+
+        with execute_wrapper(inspect_query):
+            response = self.get_response(request)
+
+        duplicate_queries = [
+            {"sql": sql, "count": len(origins), "origins": sorted(set(filter(None, origins)))}
+            for sql, origins in executions.items()
+            if len(origins) >= self.duplicate_threshold
+        ]
+        if not slow_queries and not duplicate_queries:
+            return response
+
+        report = {
+            "method": request.method,
+            "path": request.path,
+            "slow_queries": slow_queries,
+            "duplicate_queries": duplicate_queries,
+        }
+        query_logger.warning("Query inspection: %s", json.dumps(report), extra={"query_inspection": report})
+
+        if self.strict:
+            raise QueryInspectionError(json.dumps(report, indent=2))
+
+        return response
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Exposes the current request to ``PrimaryReplicaRouter`` and pins users
+    to the primary for a short while after they write.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with routing_context(request):
+            return self.get_response(request)
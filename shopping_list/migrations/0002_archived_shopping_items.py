@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def set_purchased_at(apps, schema_editor):
+    # Items bought before purchased_at existed start their archive age now.
+    ShoppingItem = apps.get_model('shopping_list', 'ShoppingItem')
+    ShoppingItem.objects.using(schema_editor.connection.alias).filter(purchased=True).update(purchased_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping_list', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedShoppingItem',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('purchased', models.BooleanField(default=True)),
+                ('purchased_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='shoppingitem',
+            name='purchased_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='shoppingitem',
+            index=models.Index(condition=models.Q(('purchased', True)), fields=['purchased_at'], name='shoppingitem_purchased_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedshoppingitem',
+            name='shopping_list',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_shopping_items', to='shopping_list.shoppinglist'),
+        ),
+        migrations.RunPython(set_purchased_at, migrations.RunPython.noop),
+    ]
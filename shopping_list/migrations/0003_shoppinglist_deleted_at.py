@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping_list', '0002_archived_shopping_items'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppinglist',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
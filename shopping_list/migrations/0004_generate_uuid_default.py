@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:33
+
+import shopping_list.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping_list', '0003_shoppinglist_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shoppingitem',
+            name='id',
+            field=models.UUIDField(default=shopping_list.uuids.generate_uuid, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='shoppinglist',
+            name='id',
+            field=models.UUIDField(default=shopping_list.uuids.generate_uuid, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
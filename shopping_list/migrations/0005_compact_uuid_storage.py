@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:36
+
+import shopping_list.fields
+import shopping_list.uuids
+import uuid
+
+from django.db import migrations
+
+UUID_COLUMNS = [
+    ('shopping_list_shoppinglist', 'id'),
+    ('shopping_list_shoppinglist_members', 'shoppinglist_id'),
+    ('shopping_list_shoppingitem', 'id'),
+    ('shopping_list_shoppingitem', 'shopping_list_id'),
+    ('shopping_list_archivedshoppingitem', 'id'),
+    ('shopping_list_archivedshoppingitem', 'shopping_list_id'),
+]
+
+
+def _convert_columns(schema_editor, function):
+    # The table rebuilds above copy the 32-character hex text as is, so
+    # rewrite every UUID column in place with a SQLite function.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.connection.ensure_connection()
+    schema_editor.connection.connection.create_function('convert_uuid', 1, function, deterministic=True)
+    for table, column in UUID_COLUMNS:
+        schema_editor.execute(f'UPDATE "{table}" SET "{column}" = convert_uuid("{column}")')
+
+
+def hex_to_bytes(apps, schema_editor):
+    _convert_columns(schema_editor, lambda value: uuid.UUID(value).bytes if isinstance(value, str) else value)
+
+
+def bytes_to_hex(apps, schema_editor):
+    _convert_columns(schema_editor, lambda value: uuid.UUID(bytes=value).hex if isinstance(value, bytes) else value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping_list', '0004_generate_uuid_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedshoppingitem',
+            name='id',
+            field=shopping_list.fields.CompactUUIDField(primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='shoppingitem',
+            name='id',
+            field=shopping_list.fields.CompactUUIDField(default=shopping_list.uuids.generate_uuid, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='shoppinglist',
+            name='id',
+            field=shopping_list.fields.CompactUUIDField(default=shopping_list.uuids.generate_uuid, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.RunPython(hex_to_bytes, bytes_to_hex),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:39
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_counters(apps, schema_editor):
+    ShoppingList = apps.get_model('shopping_list', 'ShoppingList')
+    ShoppingItem = apps.get_model('shopping_list', 'ShoppingItem')
+    using = schema_editor.connection.alias
+
+    shopping_lists = ShoppingList.objects.using(using).annotate(
+        items=Count('shopping_items'),
+        unpurchased=Count('shopping_items', filter=Q(shopping_items__purchased=False)),
+    )
+    for shopping_list in shopping_lists.iterator():
+        shopping_list.item_count = shopping_list.items
+        shopping_list.unpurchased_count = shopping_list.unpurchased
+        shopping_list.unpurchased_preview = list(
+            ShoppingItem.objects.using(using)
+            .filter(shopping_list_id=shopping_list.id, purchased=False)
+            .values_list('name', flat=True)[:settings.SHOPPING_LIST_PREVIEW_SIZE]
+        )
+        shopping_list.save(update_fields=['item_count', 'unpurchased_count', 'unpurchased_preview'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping_list', '0005_compact_uuid_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppinglist',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='shoppinglist',
+            name='unpurchased_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='shoppinglist',
+            name='unpurchased_preview',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_last_interaction(apps, schema_editor):
+    Membership = apps.get_model('shopping_list', 'Membership')
+    ShoppingList = apps.get_model('shopping_list', 'ShoppingList')
+    using = schema_editor.connection.alias
+
+    last_interaction = ShoppingList.objects.using(using).filter(id=models.OuterRef('shoppinglist_id')).values('last_interaction')
+    Membership.objects.using(using).update(last_interaction=models.Subquery(last_interaction))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping_list', '0006_shopping_list_counters'),
+    ]
+
+    operations = [
+        # The automatic members table becomes the explicit Membership model
+        # without touching the database.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='Membership',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('shoppinglist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='shopping_list.shoppinglist')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_memberships', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'shopping_list_shoppinglist_members',
+                        'unique_together': {('shoppinglist', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='shoppinglist',
+                    name='members',
+                    field=models.ManyToManyField(through='shopping_list.Membership', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='membership',
+            name='last_interaction',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_last_interaction, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['user', '-last_interaction'], name='membership_user_activity_idx'),
+        ),
+        migrations.AlterField(
+            model_name='membership',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_memberships', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
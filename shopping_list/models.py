@@ -1,27 +1,126 @@
-import uuid
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
+from shopping_list.fields import CompactUUIDField
+from shopping_list.uuids import generate_uuid
+
 
 class User(AbstractUser):
     pass
 
 
+class ShardedQuerySet(models.QuerySet):
+    def create(self, **kwargs):
+        # Unlike QuerySet.create, only pass an explicitly chosen database so
+        # the router can place the new row from its instance.
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True, using=self._db)
+        return obj
+
+
+class ActiveShoppingListManager(models.Manager.from_queryset(ShardedQuerySet)):
+    # Deleted lists disappear at once; their rows are purged later, see
+    # shopping_list.deletion.
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class ShoppingList(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = CompactUUIDField(primary_key=True, default=generate_uuid, editable=False)
     name = models.CharField(max_length=200)
-    members = models.ManyToManyField(User)
+    members = models.ManyToManyField(User, through="Membership")
     last_interaction = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Maintained with every item write, see shopping_list.counters.
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+    unpurchased_count = models.PositiveIntegerField(default=0, editable=False)
+    unpurchased_preview = models.JSONField(default=list, editable=False)
+
+    objects = ActiveShoppingListManager()
+    all_objects = ShardedQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
 
+class Membership(models.Model):
+    shoppinglist = models.ForeignKey(ShoppingList, on_delete=models.CASCADE, related_name="memberships")
+    # Covered by the leading column of membership_user_activity_idx.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="shopping_list_memberships", db_index=False)
+    # Copy of the list's last_interaction so a user's list index is a single
+    # range scan of the index below, see shopping_list.counters.
+    last_interaction = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "shopping_list_shoppinglist_members"
+        unique_together = [("shoppinglist", "user")]
+        indexes = [
+            models.Index(fields=["user", "-last_interaction"], name="membership_user_activity_idx"),
+        ]
+
+
 class ShoppingItem(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    id = CompactUUIDField(primary_key=True, default=generate_uuid)
     name = models.CharField(max_length=100)
     purchased = models.BooleanField()
+    purchased_at = models.DateTimeField(null=True, blank=True, editable=False)
     shopping_list = models.ForeignKey(ShoppingList, on_delete=models.CASCADE, related_name="shopping_items")
 
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["purchased_at"], condition=models.Q(purchased=True), name="shoppingitem_purchased_at_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ArchivedShoppingItem(models.Model):
+    id = CompactUUIDField(primary_key=True)
+    name = models.CharField(max_length=100)
+    purchased = models.BooleanField(default=True)
+    purchased_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    shopping_list = models.ForeignKey(ShoppingList, on_delete=models.CASCADE, related_name="archived_shopping_items")
+
+    objects = ShardedQuerySet.as_manager()
+
     def __str__(self):
         return self.name
+
+
+class AccessToken(models.Model):
+    """
+    Expiring API token issued by the refresh endpoint, see
+    shopping_list.tokens. Only a digest of the key is stored.
+    """
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="access_tokens")
+    # Every access and refresh token descending from one password login.
+    family = models.UUIDField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+
+class RefreshToken(models.Model):
+    digest = models.CharField(max_length=64, primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="refresh_tokens")
+    family = models.UUIDField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+    # Kept after use until it expires, so presenting it again is detected.
+    used_at = models.DateTimeField(null=True, blank=True)
+
+
+class OutboxEvent(models.Model):
+    """
+    A change to a shopping list or item, written in the same transaction as
+    the change and removed once delivered, see shopping_list.outbox.
+    """
+
+    topic = models.CharField(max_length=50)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
@@ -0,0 +1,118 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+from shopping_list.models import OutboxEvent
+from shopping_list.routers import shard_databases
+
+logger = logging.getLogger(__name__)
+
+_handlers = []
+
+_executor = None
+_scheduled = set()
+_lock = threading.Lock()
+
+
+def handler(*topics):
+    """
+    Registers a function to receive lists of OutboxEvents with one of
+    ``topics``, or every event when none are given. Events are delivered at
+    least once, so handlers must tolerate seeing one again.
+    """
+
+    def decorator(function):
+        _handlers.append((function, frozenset(topics)))
+        return function
+
+    return decorator
+
+
+def shopping_item_payload(item):
+    return {"id": str(item.id), "shopping_list": str(item.shopping_list_id), "name": item.name, "purchased": item.purchased}
+
+
+def shopping_list_payload(shopping_list):
+    return {"id": str(shopping_list.id), "name": shopping_list.name}
+
+
+def record_events(using, events):
+    """
+    Appends ``(topic, payload)`` pairs to the outbox of database ``using``,
+    inside the caller's transaction when there is one.
+    """
+    if not settings.SHOPPING_LIST_OUTBOX or not events:
+        return
+
+    OutboxEvent.objects.using(using).bulk_create([OutboxEvent(topic=topic, payload=payload) for topic, payload in events])
+    if settings.SHOPPING_LIST_OUTBOX_DISPATCH_IN_BACKGROUND:
+        transaction.on_commit(lambda: _schedule_dispatch(using), using=using)
+
+
+def record_event(using, topic, payload):
+    record_events(using, [(topic, payload)])
+
+
+def dispatch(using, batch_size=None):
+    """
+    Delivers the oldest pending events of one database to the handlers and
+    deletes them in the same transaction, so a batch is either delivered and
+    checkpointed or left for the next run. Returns the number of events
+    delivered; a handler error propagates and leaves the batch pending.
+    """
+    batch_size = batch_size or settings.SHOPPING_LIST_OUTBOX_BATCH_SIZE
+    with transaction.atomic(using=using):
+        events = OutboxEvent.objects.using(using).order_by("id")
+        if connections[using].features.has_select_for_update_skip_locked:
+            # Concurrent dispatchers take different batches.
+            events = events.select_for_update(skip_locked=True)
+        events = list(events[:batch_size])
+        if not events:
+            return 0
+
+        for function, topics in _handlers:
+            delivered = [event for event in events if not topics or event.topic in topics]
+            if delivered:
+                function(delivered)
+        OutboxEvent.objects.using(using).filter(id__in=[event.id for event in events]).delete()
+    return len(events)
+
+
+def dispatch_pending(batch_size=None):
+    """
+    Delivers every pending event on every database. Returns the number of
+    events delivered.
+    """
+    delivered = 0
+    for using in shard_databases():
+        while count := dispatch(using, batch_size):
+            delivered += count
+    return delivered
+
+
+def _dispatch_in_background(using):
+    close_old_connections()
+    try:
+        # Commits while this runs schedule another round.
+        with _lock:
+            _scheduled.discard(using)
+        while dispatch(using):
+            pass
+    except Exception:
+        logger.exception("Dispatching outbox events on %s failed, they are retried after the next write or by dispatch_outbox", using)
+    finally:
+        close_old_connections()
+
+
+def _schedule_dispatch(using):
+    global _executor
+    with _lock:
+        if using in _scheduled:
+            return
+        _scheduled.add(using)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shopping-list-outbox")
+    _executor.submit(_dispatch_in_background, using)
@@ -1,9 +1,135 @@
-from django.db.models.signals import post_save
+import copy
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+from shopping_list.capabilities import bump_membership_epochs
+from shopping_list.counters import item_saved, item_saving
+from shopping_list.db import apply_sqlite_pragmas
+from shopping_list.models import Membership, ShoppingItem, ShoppingList, User
+from shopping_list.outbox import record_event, shopping_item_payload, shopping_list_payload
+from shopping_list.uuids import generate_uuid
+
+
+@receiver(pre_save, sender=ShoppingItem)
+def track_purchase_time(sender, instance, **kwargs):
+    if not instance.purchased:
+        instance.purchased_at = None
+    elif instance.purchased_at is None:
+        instance.purchased_at = timezone.now()
 
-from shopping_list.models import ShoppingItem, ShoppingList
+
+@receiver(pre_save, sender=ShoppingItem)
+def read_stored_shopping_item(sender, instance, using, raw, **kwargs):
+    if raw or instance._state.adding:
+        return
+    item_saving(instance, using)
+
+
+@receiver(post_save, sender=ShoppingItem)
+def interaction_with_shopping_list(sender, instance, created, using, raw, **kwargs):
+    if raw:
+        return
+    item_saved(instance, created, using)
 
 
 @receiver(post_save, sender=ShoppingItem)
-def interaction_with_shopping_list(sender, instance, **kwargs):
-    ShoppingList.objects.get(id=instance.shopping_list.id).save(update_fields=["last_interaction"])
+def record_shopping_item_change(sender, instance, created, using, raw, **kwargs):
+    if raw:
+        return
+    record_event(using, "shopping_item.created" if created else "shopping_item.updated", shopping_item_payload(instance))
+
+
+@receiver(post_save, sender=ShoppingList)
+def record_shopping_list_change(sender, instance, created, using, raw, **kwargs):
+    if raw:
+        return
+    record_event(using, "shopping_list.created" if created else "shopping_list.updated", shopping_list_payload(instance))
+
+
+@receiver(post_save, sender=ShoppingList)
+def copy_last_interaction_to_memberships(sender, instance, using, raw, update_fields, **kwargs):
+    if raw or (update_fields is not None and "last_interaction" not in update_fields):
+        return
+    Membership.objects.using(using).filter(shoppinglist_id=instance.id).update(last_interaction=instance.last_interaction)
+
+
+@receiver(m2m_changed, sender=Membership)
+def copy_last_interaction_to_new_memberships(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action != "post_add" or reverse or not pk_set:
+        return
+    Membership.objects.using(using).filter(shoppinglist_id=instance.id, user_id__in=pk_set).update(last_interaction=instance.last_interaction)
+
+
+@receiver(post_save, sender=Membership)
+def copy_last_interaction_to_created_membership(sender, instance, created, using, raw, **kwargs):
+    # Memberships created directly, e.g. by the admin inline, rather than
+    # through members.add().
+    if not created or raw:
+        return
+    last_interaction = ShoppingList.all_objects.using(using).filter(id=instance.shoppinglist_id).values_list("last_interaction", flat=True).first()
+    if last_interaction is not None and last_interaction != instance.last_interaction:
+        Membership.objects.using(using).filter(pk=instance.pk).update(last_interaction=last_interaction)
+        instance.last_interaction = last_interaction
+
+
+@receiver(m2m_changed, sender=Membership)
+def invalidate_capability_tokens_of_new_members(sender, instance, action, reverse, pk_set, **kwargs):
+    # add() bulk-creates memberships without post_save; removals and clear()
+    # delete them one by one and are handled below.
+    if action == "post_add" and pk_set:
+        bump_membership_epochs([instance.pk] if reverse else pk_set)
+
+
+@receiver(post_save, sender=Membership)
+def invalidate_capability_tokens_on_membership_save(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        bump_membership_epochs([instance.user_id])
+
+
+@receiver(post_delete, sender=Membership)
+def invalidate_capability_tokens_on_membership_delete(sender, instance, **kwargs):
+    bump_membership_epochs([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+def invalidate_capability_tokens_on_user_save(sender, instance, created, using, raw, update_fields, **kwargs):
+    # Tokens carry the user's flags, e.g. is_superuser skips membership
+    # checks, so they must not outlive a change to them. Saves limited to
+    # other fields, like last_login, leave the tokens alone.
+    if raw or created or using != DEFAULT_DB_ALIAS:
+        return
+    if update_fields is not None and not {"is_active", "is_staff", "is_superuser"} & set(update_fields):
+        return
+    bump_membership_epochs([instance.pk])
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        apply_sqlite_pragmas(cursor, settings.SHOPPING_LIST_SQLITE_PRAGMAS)
+    # New primary keys for rows copied with INSERT ... SELECT, see
+    # shopping_list.bulk.
+    connection.connection.create_function("shopping_list_uuid", 0, lambda: generate_uuid().bytes)
+
+
+@receiver(post_save, sender=User)
+def copy_user_to_shards(sender, instance, using, raw, **kwargs):
+    # Memberships live next to their shopping list, so every shard needs the
+    # user rows they reference.
+    if raw or using != DEFAULT_DB_ALIAS:
+        return
+
+    for alias in settings.SHOPPING_LIST_SHARDS:
+        if alias != using:
+            shard_copy = copy.copy(instance)
+            shard_copy._state = copy.copy(instance._state)
+            shard_copy._state.adding = False
+            shard_copy.save(using=alias)
@@ -0,0 +1,233 @@
+import heapq
+import itertools
+import random
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Only shopping list data is served from replicas. Users, sessions and tokens
+# always come from the primary so authentication never sees a stale replica.
+REPLICATED_MODELS = {"shoppinglist", "shoppingitem", "archivedshoppingitem", "membership"}
+
+# Every row of these models lives on the shard chosen by its shopping list id.
+SHARDED_MODELS = {"shoppinglist", "shoppingitem", "archivedshoppingitem", "membership"}
+
+_request_state = ContextVar("shopping_list_routing_state", default=None)
+
+
+class RoutingState:
+    def __init__(self, request):
+        self.request = request
+        self.safe = request.method in SAFE_METHODS
+        self.wrote = False
+        self.pinned = None
+
+
+def _pin_key(user_id):
+    return f"shopping_list:primary-pin:{user_id}"
+
+
+def _user_id(request):
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+@contextmanager
+def routing_context(request):
+    state = RoutingState(request)
+    token = _request_state.set(state)
+    try:
+        yield state
+    finally:
+        _request_state.reset(token)
+        user_id = _user_id(request) if state.wrote else None
+        if user_id is not None:
+            cache.set(_pin_key(user_id), True, settings.SHOPPING_LIST_READ_YOUR_WRITES_WINDOW)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends shopping list reads made by safe-method requests to one of
+    ``SHOPPING_LIST_DATABASE_REPLICAS`` and everything else to the primary.
+
+    Reads stay on the primary inside a transaction, after the request has
+    written, and for ``SHOPPING_LIST_READ_YOUR_WRITES_WINDOW`` seconds after
+    the same user last wrote.
+    """
+
+    primary = DEFAULT_DB_ALIAS
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.SHOPPING_LIST_DATABASE_REPLICAS
+        state = _request_state.get()
+        if not replicas or state is None or model._meta.model_name not in REPLICATED_MODELS:
+            return self.primary
+
+        if not state.safe or state.wrote or connections[self.primary].in_atomic_block or self._pinned(state):
+            return self.primary
+
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return self.primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {self.primary, *settings.SHOPPING_LIST_DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.SHOPPING_LIST_DATABASE_REPLICAS:
+            return False
+        return None
+
+    def _pinned(self, state):
+        if state.pinned is None:
+            user_id = _user_id(state.request)
+            if user_id is None:
+                # Token authentication resolves the user inside the view, so
+                # check again on the next read.
+                return False
+            state.pinned = cache.get(_pin_key(user_id)) is not None
+        return state.pinned
+
+
+def read_variant():
+    """
+    Where shopping list reads of the current request go, "primary" or
+    "replica", for results shared between requests.
+    """
+    state = _request_state.get()
+    if not settings.SHOPPING_LIST_DATABASE_REPLICAS or state is None:
+        return "primary"
+    if not state.safe or state.wrote or PrimaryReplicaRouter()._pinned(state):
+        return "primary"
+    return "replica"
+
+
+def sharding_enabled():
+    return bool(settings.SHOPPING_LIST_SHARDS)
+
+
+def shard_databases():
+    """
+    Every alias holding shopping list rows.
+    """
+    return settings.SHOPPING_LIST_SHARDS or [DEFAULT_DB_ALIAS]
+
+
+def shard_for(shopping_list_id):
+    """
+    Database alias holding the shopping list and its items, or None when
+    sharding is disabled so normal routing applies.
+    """
+    shards = settings.SHOPPING_LIST_SHARDS
+    if not shards:
+        return None
+    if not isinstance(shopping_list_id, uuid.UUID):
+        shopping_list_id = uuid.UUID(str(shopping_list_id))
+    return shards[shopping_list_id.int % len(shards)]
+
+
+def _shopping_list_id(instance):
+    model_name = instance._meta.model_name
+    if model_name == "shoppinglist":
+        return instance.pk
+    if model_name in ("shoppingitem", "archivedshoppingitem"):
+        return instance.shopping_list_id
+    if model_name == "membership":
+        return instance.shoppinglist_id
+    return None
+
+
+class MergedQuerySets:
+    """
+    The results of an ordered queryset on every shard, merged lazily in the
+    same order. Slicing reads only the first ``stop`` rows from each shard,
+    so a page costs ``offset + limit`` rows per shard rather than every
+    match, and ``count()`` adds up a COUNT per shard.
+    """
+
+    def __init__(self, querysets, key, reverse=False):
+        self.querysets = querysets
+        self.key = key
+        self.reverse = reverse
+
+    def _merge(self, querysets):
+        return heapq.merge(*querysets, key=self.key, reverse=self.reverse)
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return self._merge(self.querysets)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if index.stop is None or index.step is not None:
+            return list(self)[index]
+        start = index.start or 0
+        return list(itertools.islice(self._merge(queryset[:index.stop] for queryset in self.querysets), start, index.stop))
+
+
+def scatter_gather(queryset, key, reverse=False):
+    """
+    Runs an ordered queryset on every shard and merges the results in the
+    same order, see MergedQuerySets. Returns the queryset untouched when
+    sharding is disabled.
+    """
+    if not sharding_enabled():
+        return queryset
+    return MergedQuerySets([queryset.using(alias) for alias in settings.SHOPPING_LIST_SHARDS], key, reverse)
+
+
+class ShardRouter:
+    """
+    Hash-partitions shopping lists, their items and memberships across
+    ``SHOPPING_LIST_SHARDS`` by shopping list id.
+
+    Rows are placed from the ``instance`` hint; queries without one must pick
+    a shard with ``.using(shard_for(pk))`` or go through ``scatter_gather``.
+    Users are a reference table copied to every shard, see
+    ``shopping_list.receivers``.
+    """
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_instance(hints.get("instance"))
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_instance(hints.get("instance"))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not sharding_enabled():
+            return None
+        if obj1._meta.model_name in SHARDED_MODELS and obj2._meta.model_name in SHARDED_MODELS:
+            return obj1._state.db == obj2._state.db
+        return True
+
+    def _db_for_instance(self, instance):
+        # Related lookups from a sharded row, e.g. a list's members, follow
+        # the row to its shard.
+        if not sharding_enabled() or instance is None or instance._meta.model_name not in SHARDED_MODELS:
+            return None
+        if instance._state.db:
+            return instance._state.db
+
+        shopping_list_id = _shopping_list_id(instance)
+        return shard_for(shopping_list_id) if shopping_list_id is not None else None
@@ -0,0 +1,51 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers arriving while a call
+    for their key is running wait for it and share its result or exception.
+
+    Waiting blocks the calling thread only. Threaded WSGI workers run each
+    request in its own thread, and under ASGI Django runs every request's
+    sync view in a thread of its own, so waiters never block the event loop
+    or the call they are waiting for.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = function()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+
+single_flight = SingleFlight()
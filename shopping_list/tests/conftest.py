@@ -1,10 +1,17 @@
 import pytest
 from rest_framework.test import APIClient
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connections
 from shopping_list.models import ShoppingItem, ShoppingList
 
 User = get_user_model()
 
+# A second database for tests that set SHOPPING_LIST_SHARDS and opt in with
+# django_db(databases=["default", "shard1"]).
+settings.DATABASES["shard1"] = {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+connections.settings = connections.configure_settings(settings.DATABASES)
+
 
 @pytest.fixture(scope="session")
 def create_shopping_item():
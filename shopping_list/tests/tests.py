@@ -1,14 +1,48 @@
+import asyncio
+import gzip
+import io
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from unittest import mock
 
 import pytest
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
+from django.core import checks
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
-from shopping_list.models import ShoppingList, ShoppingItem
+from shopping_list.admin import EstimatedCountPaginator, ShoppingItemAdmin
+from shopping_list.api.schema import generate_schema
+from shopping_list.api.serializers import ShoppingListSerializer
+from shopping_list.api.views import ListAddShoppingList
+from shopping_list.archive import archive_purchased_items
+from shopping_list.checks import check_shared_cache
+from shopping_list.concurrency import AdaptiveConcurrencyLimit, concurrency_limits
+from shopping_list.deletion import delete_shopping_item, purge_shopping_list
+from shopping_list import outbox
+from shopping_list.metrics import MetricsRegistry, registry
+from shopping_list.middleware import QueryInspectionError
+from shopping_list.models import AccessToken, ArchivedShoppingItem, Membership, OutboxEvent, RefreshToken, ShoppingList, ShoppingItem
+from shopping_list.routers import PrimaryReplicaRouter, ShardRouter, read_variant, routing_context, shard_for
+from shopping_list.singleflight import SingleFlight
+from shopping_list.tokens import issue_refresh_token, refresh_access_token
+from shopping_list.uuids import uuid7
+from shopping_list.warmup import warm_up
 
 User = get_user_model()
 
@@ -583,6 +617,48 @@ def test_call_with_token_authentication():
     assert response.status_code == status.HTTP_200_OK
 
 
+@pytest.mark.django_db
+def test_refresh_token_rotates_access_tokens_without_password(settings):
+    User.objects.create_user("test", password="supersecret")
+    client = APIClient()
+    login = client.post(reverse("api_token_auth"), {"username": "test", "password": "supersecret"}, format="json").data
+    refresh_token = login["refresh_token"]
+    assert login["token"].startswith("at-") and login["expires_in"] == settings.SHOPPING_LIST_ACCESS_TOKEN_MAX_AGE
+    assert not Token.objects.exists()
+
+    with mock.patch("django.contrib.auth.hashers.PBKDF2PasswordHasher.verify") as verify:
+        first = client.post(reverse("token_refresh"), {"refresh_token": refresh_token}, format="json").data
+        second = client.post(reverse("token_refresh"), {"refresh_token": first["refresh_token"]}, format="json").data
+    verify.assert_not_called()
+
+    for revoked in (login, first):
+        client.credentials(HTTP_AUTHORIZATION=f"Token {revoked['token']}")
+        assert client.get(reverse("all_shopping_lists")).status_code == status.HTTP_401_UNAUTHORIZED
+    client.credentials(HTTP_AUTHORIZATION=f"Token {second['token']}")
+    assert client.get(reverse("all_shopping_lists")).status_code == status.HTTP_200_OK
+
+    # Replaying a used refresh token revokes the whole family.
+    client.credentials()
+    assert client.post(reverse("token_refresh"), {"refresh_token": refresh_token}, format="json").status_code == status.HTTP_401_UNAUTHORIZED
+    assert client.post(reverse("token_refresh"), {"refresh_token": second["refresh_token"]}, format="json").status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_expired_tokens_are_rejected_and_purged(settings):
+    user = User.objects.create_user("test", password="supersecret")
+    tokens = refresh_access_token(issue_refresh_token(user))
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {tokens['token']}")
+
+    AccessToken.objects.update(expires_at=timezone.now())
+    assert client.get(reverse("all_shopping_lists")).status_code == status.HTTP_401_UNAUTHORIZED
+
+    RefreshToken.objects.update(expires_at=timezone.now())
+    call_command("purge_expired_tokens", stdout=io.StringIO())
+    assert not AccessToken.objects.exists()
+    assert not RefreshToken.objects.exists()
+
+
 @pytest.mark.django_db
 def test_add_members_list_member(create_user, create_authenticated_client, create_shopping_list):
     user = create_user()
@@ -815,3 +891,972 @@ def test_order_shopping_items_purchased_and_names(create_user, create_authentica
     assert response.data["results"][1]["name"] == "Dates"
     assert response.data["results"][2]["name"] == "Apples"
     assert response.data["results"][3]["name"] == "Coconut"
+
+
+@pytest.mark.django_db
+def test_response_includes_server_timing_breakdown(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    shopping_list = create_shopping_list(user)
+
+    url = reverse("list_add_shopping_item", args=[shopping_list.id])
+    response = client.get(url)
+
+    server_timing = response["Server-Timing"]
+    for phase in ("auth", "throttle", "perm", "view", "ser", "render", "db", "total"):
+        assert f"{phase};" in server_timing
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_histograms_per_url_name(create_user, create_authenticated_client, admin_client):
+    client = create_authenticated_client(create_user())
+    client.get(reverse("all_shopping_lists"))
+
+    response = admin_client.get(reverse("metrics"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"].startswith("text/plain")
+    assert 'shopping_list_request_duration_seconds_count{view="all_shopping_lists"}' in response.content.decode()
+    assert 'shopping_list_request_queries_bucket{view="all_shopping_lists",le="+Inf"}' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_restricted_to_admins(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+
+    response = client.get(reverse("metrics"))
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_metrics_aggregate_snapshots_from_other_workers(admin_client, settings, tmp_path):
+    settings.SHOPPING_LIST_METRICS_DIR = str(tmp_path)
+    other_worker = {
+        "latency": {"other_worker_view": {"counts": [1] + [0] * 11, "sum": 0.001}},
+        "queries": {"other_worker_view": {"counts": [0, 1] + [0] * 7, "sum": 1}},
+    }
+    (tmp_path / "metrics-999999.json").write_text(json.dumps(other_worker))
+
+    response = admin_client.get(reverse("metrics"))
+
+    assert 'shopping_list_request_duration_seconds_count{view="other_worker_view"} 1' in response.content.decode()
+
+
+def test_metrics_flushes_concurrently_and_survives_write_errors(settings, tmp_path, caplog):
+    settings.SHOPPING_LIST_METRICS_DIR = str(tmp_path)
+    registry = MetricsRegistry()
+    registry.observe("view", 0.01, 1)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: registry.flush(), range(32)))
+    assert [path.name for path in tmp_path.iterdir()] == [f"metrics-{os.getpid()}.json"]
+
+    settings.SHOPPING_LIST_METRICS_DIR = str(tmp_path / f"metrics-{os.getpid()}.json" / "not-a-directory")
+    registry.flush()
+    assert "Writing the metrics snapshot" in caplog.text
+
+
+@pytest.mark.django_db
+def test_query_inspector_logs_repeated_queries_with_origin(create_user, create_authenticated_client, create_shopping_list, settings, caplog):
+    settings.SHOPPING_LIST_QUERY_INSPECTOR = True
+    settings.SHOPPING_LIST_DUPLICATE_QUERY_THRESHOLD = 3
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    new_members = [User.objects.create_user(f"member{index}", password="password") for index in range(3)]
+
+    client = create_authenticated_client(user)
+    with caplog.at_level("WARNING", logger="shopping_list.queries"):
+        client.put(reverse("shopping_list_add_members", args=[shopping_list.id]), {"members": [member.id for member in new_members]}, format="json")
+
+    report = caplog.records[0].query_inspection
+    origins = [origin for duplicate in report["duplicate_queries"] for origin in duplicate["origins"]]
+    assert any(origin.startswith("shopping_list/api/serializers.py") for origin in origins)
+
+
+@pytest.mark.django_db
+def test_query_inspector_strict_mode_fails_request(create_user, create_authenticated_client, settings):
+    settings.SHOPPING_LIST_QUERY_INSPECTOR = True
+    settings.SHOPPING_LIST_QUERY_INSPECTOR_STRICT = True
+    settings.SHOPPING_LIST_DUPLICATE_QUERY_THRESHOLD = 3
+    user = create_user()
+    shopping_list = ShoppingList.objects.create(name="Groceries")
+    shopping_list.members.add(user)
+    new_members = [User.objects.create_user(f"member{index}", password="password") for index in range(3)]
+
+    client = create_authenticated_client(user)
+
+    with pytest.raises(QueryInspectionError):
+        client.put(reverse("shopping_list_add_members", args=[shopping_list.id]), {"members": [member.id for member in new_members]}, format="json")
+
+
+@pytest.mark.django_db
+def test_sqlite_connections_are_tuned_from_settings(settings):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA busy_timeout")
+        assert cursor.fetchone()[0] == settings.SHOPPING_LIST_SQLITE_PRAGMAS["busy_timeout"]
+        cursor.execute("PRAGMA synchronous")
+        assert cursor.fetchone()[0] == 1
+
+
+def test_safe_reads_are_routed_to_a_replica(settings, rf):
+    settings.SHOPPING_LIST_DATABASE_REPLICAS = ["replica"]
+    router = PrimaryReplicaRouter()
+
+    with routing_context(rf.get("/")):
+        assert router.db_for_read(ShoppingList) == "replica"
+        assert router.db_for_read(User) == "default"
+
+    assert router.db_for_read(ShoppingList) == "default"
+
+
+def test_reads_stay_on_primary_after_write_in_same_request(settings, rf):
+    settings.SHOPPING_LIST_DATABASE_REPLICAS = ["replica"]
+    router = PrimaryReplicaRouter()
+
+    with routing_context(rf.get("/")):
+        router.db_for_write(ShoppingItem)
+        assert router.db_for_read(ShoppingItem) == "default"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reads_stay_on_primary_inside_transaction(settings, rf):
+    settings.SHOPPING_LIST_DATABASE_REPLICAS = ["replica"]
+    router = PrimaryReplicaRouter()
+
+    with routing_context(rf.get("/")), transaction.atomic():
+        assert router.db_for_read(ShoppingItem) == "default"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_user_reads_own_writes_from_primary_on_next_request(settings, rf, create_user):
+    settings.SHOPPING_LIST_DATABASE_REPLICAS = ["replica"]
+    router = PrimaryReplicaRouter()
+    cache.clear()
+    user = create_user()
+    another_user = User.objects.create_user("another", "another@example.com", "password")
+
+    write_request = rf.post("/")
+    write_request.user = user
+    with routing_context(write_request):
+        router.db_for_write(ShoppingItem)
+
+    read_request = rf.get("/")
+    read_request.user = user
+    with routing_context(read_request):
+        assert router.db_for_read(ShoppingItem) == "default"
+
+    another_read_request = rf.get("/")
+    another_read_request.user = another_user
+    with routing_context(another_read_request):
+        assert router.db_for_read(ShoppingItem) == "replica"
+
+
+def test_shopping_lists_are_spread_across_shards_by_id(settings):
+    settings.SHOPPING_LIST_SHARDS = ["default", "shard1", "shard2"]
+    shopping_list_ids = [uuid.uuid4() for _ in range(300)]
+
+    shards = [shard_for(shopping_list_id) for shopping_list_id in shopping_list_ids]
+
+    assert set(shards) == {"default", "shard1", "shard2"}
+    assert shards == [shard_for(str(shopping_list_id)) for shopping_list_id in shopping_list_ids]
+
+
+def test_shopping_items_are_written_to_their_shopping_lists_shard(settings):
+    settings.SHOPPING_LIST_SHARDS = ["default", "shard1", "shard2"]
+    router = ShardRouter()
+    shopping_list = ShoppingList(name="Groceries")
+    shopping_item = ShoppingItem(name="Milk", purchased=False, shopping_list=shopping_list)
+
+    assert router.db_for_write(ShoppingList, instance=shopping_list) == shard_for(shopping_list.id)
+    assert router.db_for_write(ShoppingItem, instance=shopping_item) == shard_for(shopping_list.id)
+    assert router.db_for_read(User, instance=shopping_list) == shard_for(shopping_list.id)
+
+
+@pytest.mark.django_db(databases=["default", "shard1"])
+def test_sharded_reads_page_across_shards(settings, create_authenticated_client):
+    settings.SHOPPING_LIST_SHARDS = ["default", "shard1"]
+    user = User.objects.create_user("shopper", password="password")
+    now = timezone.now()
+    for index in range(8):
+        shopping_list = ShoppingList.objects.create(name=f"List {index}")
+        shopping_list.members.add(user)
+        ShoppingItem.objects.create(name=f"Item {index}", purchased=False, shopping_list=shopping_list)
+        using = shopping_list._state.db
+        ShoppingList.objects.using(using).filter(id=shopping_list.id).update(last_interaction=now - timedelta(hours=index))
+        Membership.objects.using(using).filter(shoppinglist=shopping_list).update(last_interaction=now - timedelta(hours=index))
+    assert ShoppingList.objects.using("default").exists() and ShoppingList.objects.using("shard1").exists()
+    client = create_authenticated_client(user)
+
+    with CaptureQueriesContext(connections["shard1"]) as queries:
+        response = client.get(reverse("all_shopping_lists"), {"page": 2, "fields": "name"})
+    assert response.data["count"] == 8
+    assert [result["name"] for result in response.data["results"]] == ["List 3", "List 4", "List 5"]
+    # Each shard reads at most the first two pages.
+    assert all("LIMIT 6" in query["sql"] for query in queries if "COUNT" not in query["sql"])
+
+    response = client.get(reverse("search_shopping_items"), {"page": 3})
+    assert response.data["count"] == 8
+    assert [result["name"] for result in response.data["results"]] == ["Item 6", "Item 7"]
+
+
+@pytest.mark.django_db(databases=["default", "shard1"])
+def test_query_counts_include_shard_queries(settings, create_authenticated_client):
+    settings.SHOPPING_LIST_SHARDS = ["shard1"]
+    user = User.objects.create_user("shopper", password="password")
+    shopping_list = ShoppingList.objects.create(name="Groceries")
+    shopping_list.members.add(user)
+    client = create_authenticated_client(user)
+    histogram = registry.queries["list_add_shopping_item"]
+    counted = histogram.sum
+
+    with CaptureQueriesContext(connection) as default_queries, CaptureQueriesContext(connections["shard1"]) as shard_queries:
+        client.get(reverse("list_add_shopping_item", args=[shopping_list.id]))
+
+    assert len(shard_queries) > 0
+    assert histogram.sum - counted == len(default_queries) + len(shard_queries)
+
+
+def test_shard_router_defers_when_sharding_disabled():
+    router = ShardRouter()
+
+    assert router.db_for_write(ShoppingList, instance=ShoppingList(name="Groceries")) is None
+
+
+@pytest.mark.django_db
+def test_old_purchased_items_are_archived(create_user, create_shopping_list):
+    shopping_list = create_shopping_list(create_user())
+    last_year = timezone.now() - timedelta(days=365)
+    with mock.patch("django.utils.timezone.now") as mock_now:
+        mock_now.return_value = last_year
+        ShoppingItem.objects.create(name="Old milk", purchased=True, shopping_list=shopping_list)
+    ShoppingItem.objects.create(name="New milk", purchased=True, shopping_list=shopping_list)
+    ShoppingItem.objects.create(name="Eggs", purchased=False, shopping_list=shopping_list)
+
+    archived = archive_purchased_items(older_than=timezone.now() - timedelta(days=30), batch_size=1)
+
+    assert archived == 1
+    assert set(shopping_list.shopping_items.values_list("name", flat=True)) == {"New milk", "Eggs"}
+    assert ArchivedShoppingItem.objects.get().name == "Old milk"
+
+
+@pytest.mark.django_db
+def test_list_shopping_items_includes_archived_on_request(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    shopping_list = create_shopping_list(user)
+    ShoppingItem.objects.create(name="Eggs", purchased=False, shopping_list=shopping_list)
+    ArchivedShoppingItem.objects.create(id=uuid.uuid4(), name="Old milk", shopping_list=shopping_list)
+
+    url = reverse("list_add_shopping_item", args=[shopping_list.id])
+    response = client.get(url)
+    archived_response = client.get(url + "?include_archived=true&ordering=-name")
+
+    assert [item["name"] for item in response.data["results"]] == ["Eggs"]
+    assert [item["name"] for item in archived_response.data["results"]] == ["Old milk", "Eggs"]
+
+
+@pytest.mark.django_db
+def test_deleted_shopping_list_items_are_hidden_then_purged(create_user, create_authenticated_client, create_shopping_list, admin_client):
+    user = create_user()
+    client = create_authenticated_client(user)
+    shopping_list = create_shopping_list(user)
+    ShoppingItem.objects.bulk_create([ShoppingItem(name=f"Item {index}", purchased=False, shopping_list=shopping_list) for index in range(25)])
+
+    response = client.delete(reverse("shopping_list_detail", args=[shopping_list.id]))
+    items_response = client.get(reverse("list_add_shopping_item", args=[shopping_list.id]))
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert items_response.status_code == status.HTTP_404_NOT_FOUND
+    items_url = reverse("list_add_shopping_item", args=[shopping_list.id])
+    assert admin_client.get(items_url).status_code == status.HTTP_404_NOT_FOUND
+    assert admin_client.post(items_url, {"name": "Milk", "purchased": False}, content_type="application/json").status_code == status.HTTP_404_NOT_FOUND
+    assert ShoppingItem.objects.count() == 25
+
+    purged = purge_shopping_list(shopping_list.id, "default", batch_size=10)
+
+    assert purged == 25
+    assert ShoppingItem.objects.count() == 0
+    assert not ShoppingList.all_objects.exists()
+
+
+def test_uuid7_is_time_ordered():
+    ids = [uuid7() for _ in range(1000)]
+
+    assert all(generated.version == 7 for generated in ids)
+    assert ids == sorted(ids)
+
+
+@pytest.mark.django_db
+def test_shopping_list_with_uuid7_key_is_retrieved_by_id(create_user, create_authenticated_client, settings):
+    settings.SHOPPING_LIST_UUID_VERSION = 7
+    user = create_user()
+    client = create_authenticated_client(user)
+    shopping_list = ShoppingList.objects.create(name="Groceries")
+    shopping_list.members.add(user)
+
+    response = client.get(reverse("shopping_list_detail", args=[shopping_list.id]))
+
+    assert shopping_list.id.version == 7
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_uuid_columns_are_stored_as_16_byte_blobs(create_user, create_shopping_item):
+    shopping_item = create_shopping_item("Milk", create_user())
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT id, shopping_list_id FROM shopping_list_shoppingitem")
+        stored_id, stored_shopping_list_id = cursor.fetchone()
+
+    assert stored_id == shopping_item.id.bytes
+    assert stored_shopping_list_id == shopping_item.shopping_list_id.bytes
+    assert ShoppingItem.objects.get(id=str(shopping_item.id)).shopping_list_id == shopping_item.shopping_list.id
+
+
+@pytest.mark.django_db
+def test_shopping_list_counters_follow_item_writes(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    shopping_list = create_shopping_list(user)
+    items_url = reverse("list_add_shopping_item", args=[shopping_list.id])
+
+    client.post(items_url, {"name": "Milk", "purchased": False}, format="json")
+    eggs = client.post(items_url, {"name": "Eggs", "purchased": False}, format="json").data
+    bread = client.post(items_url, {"name": "Bread", "purchased": False}, format="json").data
+    client.patch(reverse("shopping_item_detail", args=[shopping_list.id, eggs["id"]]), {"purchased": True}, format="json")
+    client.delete(reverse("shopping_item_detail", args=[shopping_list.id, bread["id"]]))
+
+    response = client.get(reverse("shopping_list_detail", args=[shopping_list.id]))
+
+    assert response.data["item_count"] == 2
+    assert response.data["unpurchased_count"] == 1
+    assert response.data["unpurchased_items"] == [{"name": "Milk"}]
+
+
+@pytest.mark.django_db
+def test_shopping_list_counters_ignore_stale_instances(create_user, create_shopping_list):
+    shopping_list = create_shopping_list(create_user())
+    milk = ShoppingItem.objects.create(name="Milk", purchased=False, shopping_list=shopping_list)
+    eggs = ShoppingItem.objects.create(name="Eggs", purchased=False, shopping_list=shopping_list)
+
+    # Two requests that loaded the item before either saved it.
+    first, second = ShoppingItem.objects.get(id=milk.id), ShoppingItem.objects.get(id=milk.id)
+    for item in (first, second):
+        item.purchased = True
+        item.save()
+    first, second = ShoppingItem.objects.get(id=eggs.id), ShoppingItem.objects.get(id=eggs.id)
+    delete_shopping_item(first)
+    delete_shopping_item(second)
+    shopping_list.refresh_from_db()
+
+    assert (shopping_list.item_count, shopping_list.unpurchased_count) == (1, 0)
+
+
+@pytest.mark.django_db
+def test_shopping_list_counters_are_repaired(create_user, create_shopping_list):
+    shopping_list = create_shopping_list(create_user())
+    ShoppingItem.objects.bulk_create([
+        ShoppingItem(name="Milk", purchased=False, shopping_list=shopping_list),
+        ShoppingItem(name="Eggs", purchased=True, shopping_list=shopping_list),
+    ])
+
+    call_command("repair_shopping_list_counters", stdout=io.StringIO())
+    shopping_list.refresh_from_db()
+
+    assert shopping_list.item_count == 2
+    assert shopping_list.unpurchased_count == 1
+    assert shopping_list.unpurchased_preview == ["Milk"]
+
+
+@pytest.mark.django_db
+def test_membership_activity_follows_shopping_list(create_user, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+
+    ShoppingItem.objects.create(name="Milk", purchased=False, shopping_list=shopping_list)
+    shopping_list.refresh_from_db()
+
+    assert Membership.objects.get(user=user).last_interaction == shopping_list.last_interaction
+
+    ShoppingList.objects.filter(id=shopping_list.id).update(last_interaction=timezone.now() - timedelta(days=1))
+    shopping_list.refresh_from_db()
+    membership = Membership.objects.create(shoppinglist=shopping_list, user=User.objects.create_user("member", password="password"))
+    assert Membership.objects.get(id=membership.id).last_interaction == shopping_list.last_interaction
+
+
+@pytest.mark.django_db
+def test_shopping_lists_are_limited_to_requested_fields(create_user, create_authenticated_client, create_shopping_list, django_assert_num_queries):
+    user = create_user()
+    create_shopping_list(user)
+    create_shopping_list(user)
+    client = create_authenticated_client(user)
+    client.get(reverse("all_shopping_lists"))
+
+    # Session, user, count and page; no members prefetch.
+    with django_assert_num_queries(4):
+        response = client.get(reverse("all_shopping_lists"), {"fields": "id,name"})
+
+    assert [set(shopping_list) for shopping_list in response.data["results"]] == [{"id", "name"}, {"id", "name"}]
+
+
+@pytest.mark.django_db
+def test_shopping_list_detail_expands_items(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    ShoppingItem.objects.create(name="Milk", purchased=True, shopping_list=shopping_list)
+    ShoppingItem.objects.create(name="Eggs", purchased=False, shopping_list=shopping_list)
+    client = create_authenticated_client(user)
+
+    response = client.get(reverse("shopping_list_detail", args=[shopping_list.id]), {"expand": "items", "fields": "id,items"})
+
+    assert set(response.data) == {"id", "items"}
+    assert [item["name"] for item in response.data["items"]] == ["Eggs", "Milk"]
+
+
+@pytest.mark.django_db
+def test_shopping_lists_are_retrieved_by_ids_in_requested_order(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    first = create_shopping_list(user)
+    second = create_shopping_list(user)
+    other = create_shopping_list(User.objects.create_user("other", password="password"))
+    missing = uuid.uuid4()
+    client = create_authenticated_client(user)
+
+    ids = [second.id, other.id, missing, first.id]
+    response = client.get(reverse("all_shopping_lists"), {"ids": ",".join(str(shopping_list_id) for shopping_list_id in ids)})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["id"] for result in response.data["results"]] == [str(shopping_list_id) for shopping_list_id in ids]
+    assert response.data["results"][0]["name"] == second.name
+    assert response.data["results"][1]["error"] == "forbidden"
+    assert response.data["results"][2]["error"] == "not_found"
+
+
+@pytest.mark.django_db
+def test_shopping_lists_by_ids_rejects_malformed_ids(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+
+    response = client.get(reverse("all_shopping_lists"), {"ids": "not-a-uuid"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_export_streams_shopping_lists_memberships_and_items(create_user, create_authenticated_client, create_shopping_item):
+    user = create_user()
+    shopping_item = create_shopping_item("Milk", user)
+    create_shopping_item("Hidden", User.objects.create_user("other", password="password"))
+    client = create_authenticated_client(user)
+
+    response = client.get(reverse("export_shopping_lists"))
+    records = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+    assert response["Content-Type"].startswith("application/x-ndjson")
+    assert [record["type"] for record in records] == ["shopping_list", "membership", "shopping_item"]
+    assert records[2]["name"] == "Milk"
+    assert records[2]["shopping_list"] == str(shopping_item.shopping_list_id)
+
+
+@pytest.mark.django_db
+def test_export_command_writes_csv(create_user, create_shopping_item):
+    create_shopping_item("Milk", create_user())
+    output = io.StringIO()
+
+    call_command("export_shopping_lists", "testuser", "--format", "csv", stdout=output)
+    lines = output.getvalue().splitlines()
+
+    assert lines[0] == "type,id,shopping_list,name,purchased,purchased_at,archived,user,last_interaction"
+    assert lines[-1].startswith("shopping_item,")
+
+
+@pytest.mark.django_db
+def test_import_creates_items_in_batches_and_reports_row_errors(create_user, create_authenticated_client, create_shopping_item):
+    user = create_user()
+    existing = create_shopping_item("Milk", user)
+    client = create_authenticated_client(user)
+    rows = "\n".join([
+        "shopping_list,name,purchased",
+        f"{existing.shopping_list_id},Milk,false",
+        f"{existing.shopping_list_id},Eggs,false",
+        "Hardware,Nails,true",
+        "Hardware,Screws,false",
+        "Hardware,Screws,false",
+        f"{uuid.uuid4()},Bread,false",
+    ])
+
+    response = client.post(reverse("import_shopping_lists"), data=rows, content_type="text/csv")
+
+    assert response.data["created_shopping_lists"] == 1
+    assert response.data["created_items"] == 3
+    assert [error["row"] for error in response.data["errors"]] == [1, 5, 6]
+    existing.shopping_list.refresh_from_db()
+    assert existing.shopping_list.item_count == 2
+    assert existing.shopping_list.unpurchased_preview == ["Milk", "Eggs"]
+    hardware = ShoppingList.objects.get(name="Hardware")
+    assert hardware.item_count == 2 and hardware.unpurchased_count == 1
+    assert hardware.members.get() == user
+
+
+@pytest.mark.django_db
+def test_export_can_be_imported(create_user, create_shopping_item, tmp_path):
+    create_shopping_item("Milk", create_user())
+    call_command("export_shopping_lists", "testuser", "--output", str(tmp_path / "export.ndjson"))
+    User.objects.create_user("newuser", password="password")
+
+    call_command("import_shopping_lists", "newuser", str(tmp_path / "export.ndjson"), stdout=io.StringIO())
+
+    imported = ShoppingList.objects.get(members__username="newuser")
+    assert list(imported.shopping_items.values_list("name", flat=True)) == ["Milk"]
+
+
+@pytest.mark.django_db
+def test_schema_is_served_from_precomputed_file_with_etag(create_user, create_authenticated_client, settings, tmp_path):
+    settings.SHOPPING_LIST_SCHEMA_DIR = tmp_path
+    settings.SHOPPING_LIST_CODE_VERSION = "test-version"
+    client = create_authenticated_client(create_user())
+
+    response = client.get(reverse("schema"), HTTP_ACCEPT="application/json")
+    cached = client.get(reverse("schema"), HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=response["ETag"])
+
+    assert json.loads(response.content)["openapi"].startswith("3.")
+    assert (tmp_path / "openapi-test-version.json").read_bytes() == response.content
+    assert "private" in response["Cache-Control"]
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_schema_gzip_variant_is_served_and_regenerated_on_new_code_version(create_user, create_authenticated_client, settings, tmp_path):
+    settings.SHOPPING_LIST_SCHEMA_DIR = tmp_path
+    settings.SHOPPING_LIST_CODE_VERSION = "v1"
+    call_command("generate_schema", stdout=io.StringIO())
+    settings.SHOPPING_LIST_CODE_VERSION = "v2"
+    client = create_authenticated_client(create_user())
+
+    response = client.get(reverse("schema"), HTTP_ACCEPT_ENCODING="gzip")
+
+    assert response["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.content) == (tmp_path / "openapi-v2.yaml").read_bytes()
+    assert not (tmp_path / "openapi-v1.yaml").exists()
+
+
+def test_deferred_schema_extensions_are_applied_on_generation(settings):
+    settings.SHOPPING_LIST_CODE_VERSION = "deferred-extensions"
+
+    schema = json.loads(generate_schema()["json"].body)
+
+    request_body = schema["paths"]["/api/shopping-lists/{id}/add-members/"]["put"]["requestBody"]
+    assert request_body["content"]["application/json"]["schema"]["$ref"] == "#/components/schemas/AddMember"
+    assert "/api/metrics/" not in schema["paths"]
+
+
+def test_warm_up_builds_api_serializers():
+    views = warm_up()
+
+    assert ListAddShoppingList in views
+
+
+def test_startup_report_lists_phases_and_imports():
+    output = io.StringIO()
+
+    call_command("startup_report", "--limit", "3", stdout=output)
+
+    assert "django.setup" in output.getvalue()
+    assert "Import time by package" in output.getvalue()
+
+
+def test_concurrency_limit_backs_off_on_slow_requests_and_recovers():
+    limit = AdaptiveConcurrencyLimit(initial=10, minimum=2, maximum=20, tolerance=2.0, backoff=0.5)
+    for latency in (0.01, 0.01, 0.5):
+        assert limit.try_acquire()
+        limit.release(latency)
+
+    assert limit.limit < 10
+    backed_off = limit.limit
+
+    for _ in range(20):
+        limit.try_acquire()
+        limit.release(0.01)
+
+    assert limit.limit > backed_off
+
+
+def test_concurrency_limit_holds_under_variable_healthy_latency():
+    limit = AdaptiveConcurrencyLimit(initial=20, minimum=2, maximum=200, tolerance=2.0, backoff=0.9)
+    latencies = random.Random(1)
+
+    # 100 requests per second around a 30 ms median, without any slowdown,
+    # then a database ten times slower.
+    with mock.patch("shopping_list.concurrency.time.monotonic") as monotonic:
+        for index in range(3000):
+            monotonic.return_value = index * 0.01
+            assert limit.try_acquire()
+            limit.release(0.03 * math.exp(latencies.gauss(0, 0.5)))
+            assert limit.limit >= 20
+        healthy = limit.limit
+
+        for index in range(3000, 3050):
+            monotonic.return_value = index * 0.01
+            limit.try_acquire()
+            limit.release(0.3)
+    assert limit.limit < healthy
+
+
+@pytest.mark.django_db
+def test_load_shedding_sheds_reads_before_writes(settings, create_user, create_authenticated_client):
+    settings.SHOPPING_LIST_LOAD_SHEDDING = True
+    concurrency_limits.clear()
+    client = create_authenticated_client(create_user())
+    limit = concurrency_limits.get("all_shopping_lists")
+    limit.limit = 10
+    limit.in_flight = 8
+    try:
+        shed = client.get(reverse("all_shopping_lists"))
+        admitted = client.post(reverse("all_shopping_lists"), {"name": "Groceries"}, format="json")
+    finally:
+        concurrency_limits.clear()
+
+    assert shed.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert shed["Retry-After"] == "1"
+    assert admitted.status_code == status.HTTP_201_CREATED
+
+
+def test_single_flight_shares_one_call_between_concurrent_threads():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"name": "Groceries"}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flight.do, "list", compute)
+        started.wait(5)
+        followers = [executor.submit(flight.do, "list", compute) for _ in range(3)]
+        time.sleep(0.05)
+        release.set()
+        results = [future.result() for future in [leader, *followers]]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_single_flight_works_from_asyncio():
+    flight = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "items"
+
+    async def poll():
+        call = sync_to_async(flight.do, thread_sensitive=False)
+        return await asyncio.gather(*(call("items", compute) for _ in range(4)))
+
+    assert asyncio.run(poll()) == ["items"] * 4
+    assert len(calls) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("coalesce", [True, False])
+def test_coalesced_reads_still_check_membership_per_user(coalesce, create_user, create_authenticated_client, create_shopping_list, settings):
+    settings.SHOPPING_LIST_COALESCE_READS = coalesce
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    member = create_authenticated_client(user)
+    outsider = create_authenticated_client(User.objects.create_user("outsider", password="password"))
+    url = reverse("shopping_list_detail", args=[shopping_list.id]) + "?expand=items"
+
+    assert member.get(url).data["name"] == shopping_list.name
+    with mock.patch.object(ShoppingListSerializer, "to_representation") as to_representation:
+        assert outsider.get(url).status_code == status.HTTP_403_FORBIDDEN
+    to_representation.assert_not_called()
+    assert outsider.get(reverse("list_add_shopping_item", args=[shopping_list.id])).status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_system_checks_discover_and_check_model_admins():
+    with mock.patch("django.contrib.admin.autodiscover") as autodiscover, \
+            mock.patch.object(ShoppingItemAdmin, "list_display", ["no_such_field"]):
+        errors = checks.run_checks(tags=[checks.Tags.admin])
+    autodiscover.assert_called_once_with()
+    assert [error.id for error in errors] == ["admin.E108"]
+
+
+@pytest.mark.django_db
+def test_admin_mark_purchased_action_refreshes_counters(create_user, create_shopping_list, admin_client):
+    shopping_list = create_shopping_list(create_user())
+    items = [ShoppingItem.objects.create(name=name, purchased=False, shopping_list=shopping_list) for name in ("Eggs", "Milk")]
+
+    response = admin_client.post(
+        reverse("admin:shopping_list_shoppingitem_changelist"),
+        {"action": "mark_purchased", "_selected_action": [str(item.id) for item in items]},
+    )
+
+    assert response.status_code == status.HTTP_302_FOUND
+    shopping_list.refresh_from_db()
+    assert shopping_list.unpurchased_count == 0
+    assert shopping_list.unpurchased_preview == []
+    assert ShoppingItem.objects.filter(purchased=True, purchased_at__isnull=False).count() == 2
+
+
+@pytest.mark.django_db
+def test_admin_paginator_caps_the_count_without_an_estimate(create_user, create_shopping_list, settings, django_assert_num_queries):
+    settings.SHOPPING_LIST_ADMIN_EXACT_COUNT_LIMIT = 2
+    shopping_list = create_shopping_list(create_user())
+    ShoppingItem.objects.bulk_create([ShoppingItem(name=f"Item {index}", purchased=False, shopping_list=shopping_list) for index in range(5)])
+    paginator = EstimatedCountPaginator(ShoppingItem.objects.order_by("id"), 1)
+
+    with django_assert_num_queries(1):
+        assert paginator.count == 3
+
+
+@pytest.mark.django_db
+def test_admin_changelist_searches_ids_exactly(create_user, create_shopping_item, admin_client, settings):
+    settings.SHOPPING_LIST_ADMIN_EXACT_COUNT_LIMIT = 1
+    item = create_shopping_item("Eggs", create_user())
+    ShoppingItem.objects.create(name="Milk", purchased=False, shopping_list=item.shopping_list)
+    url = reverse("admin:shopping_list_shoppingitem_changelist")
+
+    assert admin_client.get(url).context["cl"].result_count == 2
+    assert admin_client.get(url, {"q": str(item.shopping_list_id)}).context["cl"].result_count == 2
+    assert admin_client.get(url, {"q": str(item.id)}).context["cl"].result_count == 1
+    assert admin_client.get(url, {"q": "Eggs"}).context["cl"].result_count == 0
+    assert admin_client.get(reverse("admin:shopping_list_shoppinglist_changelist"), {"q": "testuser"}).context["cl"].result_count == 1
+
+
+@pytest.mark.django_db
+def test_capability_token_skips_auth_and_membership_queries(settings, create_user, create_authenticated_client, create_shopping_item, django_assert_num_queries):
+    settings.SHOPPING_LIST_CAPABILITY_TOKENS = True
+    user = create_user()
+    item = create_shopping_item("Eggs", user)
+    other_list = ShoppingList.objects.create(name="Not mine")
+    token = create_authenticated_client(user).post(reverse("capability_token")).data["token"]
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    # The page count and the items themselves.
+    with django_assert_num_queries(2):
+        response = client.get(reverse("list_add_shopping_item", args=[item.shopping_list_id]))
+    assert response.data["results"][0]["name"] == "Eggs"
+
+    with django_assert_num_queries(0):
+        response = client.get(reverse("list_add_shopping_item", args=[other_list.id]))
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert client.post(reverse("capability_token")).status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_shared_cache_check_refuses_process_local_caches(settings):
+    settings.SHOPPING_LIST_CAPABILITY_TOKENS = True
+    assert [error.id for error in check_shared_cache(None)] == ["shopping_list.E001"]
+
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://localhost"}}
+    assert check_shared_cache(None) == []
+
+
+@pytest.mark.django_db
+def test_user_changes_invalidate_capability_tokens(settings, create_user, create_authenticated_client, create_shopping_list):
+    settings.SHOPPING_LIST_CAPABILITY_TOKENS = True
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    token = create_authenticated_client(user).post(reverse("capability_token")).data["token"]
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    url = reverse("shopping_list_detail", args=[shopping_list.id])
+    assert client.get(url).status_code == status.HTTP_200_OK
+
+    user.is_active = False
+    user.save()
+
+    assert client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_membership_changes_invalidate_capability_tokens(settings, create_user, create_authenticated_client, create_shopping_list):
+    settings.SHOPPING_LIST_CAPABILITY_TOKENS = True
+    user = create_user()
+    owner = User.objects.create_user("owner", password="password")
+    shopping_list = create_shopping_list(owner)
+    authenticated = create_authenticated_client(user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {authenticated.post(reverse('capability_token')).data['token']}")
+    assert client.get(reverse("all_shopping_lists")).status_code == status.HTTP_200_OK
+
+    create_authenticated_client(owner).put(reverse("shopping_list_add_members", args=[shopping_list.id]), {"members": [user.id]}, format="json")
+
+    response = client.get(reverse("shopping_list_detail", args=[shopping_list.id]))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response["WWW-Authenticate"] == "Token"
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {authenticated.post(reverse('capability_token')).data['token']}")
+    assert client.get(reverse("shopping_list_detail", args=[shopping_list.id])).data["name"] == shopping_list.name
+
+    create_authenticated_client(owner).put(reverse("shopping_list_remove_members", args=[shopping_list.id]), {"members": [user.id]}, format="json")
+    assert client.get(reverse("shopping_list_detail", args=[shopping_list.id])).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_outbox_delivers_changes_at_least_once(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    OutboxEvent.objects.all().delete()
+    url = reverse("list_add_shopping_item", args=[shopping_list.id])
+    item_id = client.post(url, {"name": "Eggs", "purchased": False}, format="json").data["id"]
+    client.delete(reverse("shopping_item_detail", args=[shopping_list.id, item_id]))
+
+    received, failing = [], mock.Mock(side_effect=RuntimeError)
+    with mock.patch.object(outbox, "_handlers", []):
+        outbox.handler("shopping_item.created", "shopping_item.deleted")(lambda events: received.extend(events))
+        outbox.handler()(failing)
+        with pytest.raises(RuntimeError):
+            outbox.dispatch("default")
+        assert OutboxEvent.objects.count() == 2
+
+        failing.side_effect = None
+        assert outbox.dispatch_pending() == 2
+
+    assert [event.topic for event in received] == ["shopping_item.created", "shopping_item.deleted"] * 2
+    assert received[-1].payload == {"id": item_id, "shopping_list": str(shopping_list.id), "name": "Eggs", "purchased": False}
+    assert len(failing.call_args.args[0]) == 2
+    assert not OutboxEvent.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_outbox_dispatches_in_background_after_commit(create_user, create_shopping_list):
+    shopping_list = create_shopping_list(create_user())
+    # The executor has one worker, so this waits for pending dispatches.
+    outbox._executor.submit(lambda: None).result(timeout=5)
+    received = []
+
+    with mock.patch.object(outbox, "_handlers", []):
+        outbox.handler("shopping_list.updated")(received.extend)
+        shopping_list.name = "Renamed"
+        # As in the API, so the dispatch starts once the whole save committed.
+        with transaction.atomic():
+            shopping_list.save()
+        outbox._executor.submit(lambda: None).result(timeout=5)
+
+    assert [event.payload["name"] for event in received] == ["Renamed"]
+    assert not OutboxEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_duplicate_shopping_list_copies_items_in_one_statement(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    for name, purchased in (("Milk", False), ("Milk", True), ("Eggs", True)):
+        ShoppingItem.objects.create(name=name, purchased=purchased, shopping_list=shopping_list)
+    client = create_authenticated_client(user)
+    url = reverse("duplicate_shopping_list", args=[shopping_list.id])
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(url, {"name": "Next week"}, format="json")
+    assert response.status_code == status.HTTP_201_CREATED
+    assert sum("INSERT INTO \"shopping_list_shoppingitem\"" in query["sql"] for query in queries) == 1
+    assert (response.data["name"], response.data["item_count"], response.data["unpurchased_count"]) == ("Next week", 3, 1)
+
+    response = client.post(url, {"unpurchased_only": True}, format="json")
+    assert (response.data["name"], response.data["item_count"]) == (shopping_list.name, 1)
+
+    response = client.post(url, {"reset_purchased": True}, format="json")
+    copied = ShoppingItem.objects.filter(shopping_list_id=response.data["id"])
+    assert sorted(copied.values_list("name", "purchased")) == [("Eggs", False), ("Milk", False)]
+    assert not copied.filter(id__in=shopping_list.shopping_items.values("id")).exists()
+
+
+@pytest.mark.django_db
+def test_move_items_reassigns_them_with_one_update(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    source, target = create_shopping_list(user), create_shopping_list(user)
+    milk, bread = (ShoppingItem.objects.create(name=name, purchased=False, shopping_list=source) for name in ("Milk", "Bread"))
+    ShoppingItem.objects.create(name="Milk", purchased=False, shopping_list=target)
+    missing = uuid.uuid4()
+    client = create_authenticated_client(user)
+    url = reverse("move_shopping_items", args=[source.id])
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(url, {"items": [str(milk.id), str(bread.id), str(missing)], "to": str(target.id)}, format="json")
+    assert sum(query["sql"].startswith("UPDATE \"shopping_list_shoppingitem\"") for query in queries) == 1
+    assert response.data == {
+        "moved": [bread.id],
+        "errors": [{"id": str(milk.id), "error": "duplicate"}, {"id": str(missing), "error": "not_found"}],
+    }
+    source.refresh_from_db()
+    target.refresh_from_db()
+    assert (source.item_count, target.item_count, sorted(target.unpurchased_preview)) == (1, 2, ["Bread", "Milk"])
+
+    other_list = ShoppingList.objects.create(name="Not mine")
+    response = client.post(url, {"items": [str(milk.id)], "to": str(other_list.id)}, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_batch_authenticates_and_throttles_once(create_user, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    ShoppingItem.objects.create(name="Milk", purchased=False, shopping_list=shopping_list)
+    other_list = ShoppingList.objects.create(name="Not mine")
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+    paths = [
+        reverse("all_shopping_lists"),
+        reverse("list_add_shopping_item", args=[shopping_list.id]) + "?fields=name",
+        reverse("shopping_list_detail", args=[other_list.id]),
+        "/api/no-such-endpoint/",
+        reverse("batch"),
+    ]
+
+    with mock.patch("rest_framework.throttling.SimpleRateThrottle.throttle_success", autospec=True, return_value=True) as throttled, \
+            CaptureQueriesContext(connection) as queries:
+        response = client.post(reverse("batch"), {"paths": paths}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["status"] for result in response.data] == [200, 200, 403, 404, 400]
+    assert response.data[0]["body"]["results"][0]["name"] == "Groceries"
+    assert response.data[1]["body"]["results"] == [{"name": "Milk"}]
+    assert sum("authtoken_token" in query["sql"] for query in queries) == 1
+    assert throttled.call_count == 2
+
+
+@pytest.mark.django_db
+def test_batched_gets_are_routed_and_recorded_like_standalone_gets(settings, create_user, create_authenticated_client, create_shopping_list):
+    settings.SHOPPING_LIST_DATABASE_REPLICAS = ["replica"]
+    cache.clear()
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    histogram = registry.latency["shopping_list_detail"]
+    recorded = sum(histogram.counts)
+    variants = []
+
+    def db_for_read(router, model, **hints):
+        if model is ShoppingList:
+            variants.append(read_variant())
+        return "default"
+
+    with mock.patch.object(PrimaryReplicaRouter, "db_for_read", autospec=True, side_effect=db_for_read):
+        response = client.post(reverse("batch"), {"paths": [reverse("shopping_list_detail", args=[shopping_list.id])]}, format="json")
+
+    assert response.data[0]["status"] == 200
+    assert variants and set(variants) == {"replica"}
+    assert sum(histogram.counts) == recorded + 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_runs_in_parallel(settings, create_user, create_authenticated_client, create_shopping_list):
+    settings.SHOPPING_LIST_BATCH_THREADS = 3
+    # A background outbox dispatch would hold table locks the batch threads
+    # wait on in the shared in-memory database.
+    settings.SHOPPING_LIST_OUTBOX_DISPATCH_IN_BACKGROUND = False
+    user = create_user()
+    shopping_lists = [create_shopping_list(user) for _ in range(3)]
+    client = create_authenticated_client(user)
+    paths = [reverse("shopping_list_detail", args=[shopping_list.id]) for shopping_list in shopping_lists]
+    response = client.post(reverse("batch"), {"paths": paths}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["body"]["id"] for result in response.data] == [str(shopping_list.id) for shopping_list in shopping_lists]
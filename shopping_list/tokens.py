@@ -0,0 +1,105 @@
+import hashlib
+import secrets
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from shopping_list.models import AccessToken, RefreshToken
+
+ACCESS_TOKEN_PREFIX = "at-"
+REFRESH_TOKEN_PREFIX = "rt-"
+
+
+def token_digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _new_key(prefix):
+    return f"{prefix}{secrets.token_urlsafe(32)}"
+
+
+def issue_refresh_token(user, family=None):
+    """
+    Starts a token family after a password login, or continues ``family``.
+    """
+    key = _new_key(REFRESH_TOKEN_PREFIX)
+    RefreshToken.objects.create(
+        digest=token_digest(key),
+        user=user,
+        family=family or uuid.uuid4(),
+        expires_at=timezone.now() + timedelta(seconds=settings.SHOPPING_LIST_REFRESH_TOKEN_MAX_AGE),
+    )
+    return key
+
+
+def issue_tokens(user, family=None):
+    """
+    Issues an expiring access token and a refresh token, starting a token
+    family after a password login or continuing ``family``. Replaces the
+    family's previous access token.
+    """
+    family = family or uuid.uuid4()
+    AccessToken.objects.filter(family=family).delete()
+    access_key = _new_key(ACCESS_TOKEN_PREFIX)
+    AccessToken.objects.create(
+        digest=token_digest(access_key),
+        user=user,
+        family=family,
+        expires_at=timezone.now() + timedelta(seconds=settings.SHOPPING_LIST_ACCESS_TOKEN_MAX_AGE),
+    )
+    return {
+        "token": access_key,
+        "expires_in": settings.SHOPPING_LIST_ACCESS_TOKEN_MAX_AGE,
+        "refresh_token": issue_refresh_token(user, family),
+    }
+
+
+def refresh_access_token(refresh_key):
+    """
+    Exchanges a refresh token for a new access token and refresh token,
+    without a password check. Returns None for unknown, expired or already
+    used refresh tokens.
+
+    The old refresh token and the family's previous access token stop
+    working. Presenting a used refresh token again means it leaked, so the
+    whole family is revoked.
+    """
+    digest = token_digest(refresh_key)
+    now = timezone.now()
+    with transaction.atomic():
+        # Claimed with one UPDATE so concurrent refreshes can't both win.
+        claimed = RefreshToken.objects.filter(digest=digest, used_at__isnull=True, expires_at__gt=now).update(used_at=now)
+        refresh_token = RefreshToken.objects.select_related("user").filter(digest=digest).first()
+        if refresh_token is None:
+            return None
+        if not claimed:
+            if refresh_token.used_at is not None:
+                revoke_token_family(refresh_token.family)
+            return None
+        if not refresh_token.user.is_active:
+            return None
+        return issue_tokens(refresh_token.user, refresh_token.family)
+
+
+def revoke_token_family(family):
+    AccessToken.objects.filter(family=family).delete()
+    RefreshToken.objects.filter(family=family).delete()
+
+
+def purge_expired_tokens(batch_size=1000):
+    """
+    Deletes expired access and refresh tokens in chunks of ``batch_size``
+    raw DELETEs. Returns the number of tokens removed.
+    """
+    now = timezone.now()
+    purged = 0
+    for model in (AccessToken, RefreshToken):
+        while True:
+            digests = list(model.objects.filter(expires_at__lte=now).values_list("digest", flat=True)[:batch_size])
+            if not digests:
+                break
+            purged += model.objects.filter(digest__in=digests).delete()[0]
+    return purged
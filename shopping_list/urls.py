@@ -1,18 +1,24 @@
 from django.urls import path, include
-from rest_framework.authtoken.views import obtain_auth_token
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from shopping_list.api.views import ListAddShoppingList, ShoppingListDetail, ListAddShoppingItem, ShoppingItemDetail, ShoppingListAddMembers, ShoppingListRemoveMembers, SearchShoppingItems
+from shopping_list.lazy_urls import lazy_include
+from shopping_list.api.views import Batch, DuplicateShoppingList, IssueCapabilityToken, MoveShoppingItems, ListAddShoppingList, ObtainAuthTokenWithRefresh, RefreshAccessToken, ShoppingListDetail, ListAddShoppingItem, ShoppingItemDetail, ShoppingListAddMembers, ShoppingListRemoveMembers, SearchShoppingItems, Metrics, ExportShoppingLists, ImportShoppingLists
 
 urlpatterns = [
     path("api-auth/", include("rest_framework.urls", namespace="rest_framework")),
-    path("api-token-auth/", obtain_auth_token, name="api_token_auth"),
+    path("api-token-auth/", ObtainAuthTokenWithRefresh.as_view(), name="api_token_auth"),
+    path("api/token-refresh/", RefreshAccessToken.as_view(), name="token_refresh"),
+    path("api/capability-token/", IssueCapabilityToken.as_view(), name="capability_token"),
     path("api/search-shopping-items/", SearchShoppingItems.as_view(), name="search_shopping_items"),
     path("api/shopping-lists/", ListAddShoppingList.as_view(), name="all_shopping_lists"),
     path("api/shopping-lists/<uuid:pk>/", ShoppingListDetail.as_view(), name="shopping_list_detail"),
     path("api/shopping-lists/<uuid:pk>/add-members/", ShoppingListAddMembers.as_view(), name="shopping_list_add_members"),
     path("api/shopping-lists/<uuid:pk>/remove-members/", ShoppingListRemoveMembers.as_view(), name="shopping_list_remove_members"),
+    path("api/shopping-lists/<uuid:pk>/duplicate/", DuplicateShoppingList.as_view(), name="duplicate_shopping_list"),
+    path("api/shopping-lists/<uuid:pk>/move-items/", MoveShoppingItems.as_view(), name="move_shopping_items"),
     path("api/shopping-lists/<uuid:pk>/shopping-items/", ListAddShoppingItem.as_view(), name="list_add_shopping_item"),
     path("api/shopping-lists/<uuid:pk>/shopping-items/<uuid:item_pk>/", ShoppingItemDetail.as_view(), name="shopping_item_detail"),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger_ui'),
+    path("api/export/", ExportShoppingLists.as_view(), name="export_shopping_lists"),
+    path("api/import/", ImportShoppingLists.as_view(), name="import_shopping_lists"),
+    path("api/batch/", Batch.as_view(), name="batch"),
+    path("api/metrics/", Metrics.as_view(), name="metrics"),
+    lazy_include("api/", "shopping_list.api.docs_urls"),
 ]
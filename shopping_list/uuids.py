@@ -0,0 +1,47 @@
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_last_timestamp = 0
+_counter = 0
+
+
+def uuid7():
+    """
+    Time-ordered UUID as specified in RFC 9562: a 48-bit Unix timestamp in
+    milliseconds, then a 12-bit counter that keeps ids generated within the
+    same millisecond in order, then 62 random bits.
+    """
+    global _last_timestamp, _counter
+
+    with _lock:
+        timestamp = time.time_ns() // 1_000_000
+        if timestamp <= _last_timestamp:
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_timestamp += 1
+                _counter = 0
+            timestamp = _last_timestamp
+        else:
+            _last_timestamp = timestamp
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+
+        counter = _counter
+
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (timestamp & ((1 << 48) - 1)) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | random_bits
+    return uuid.UUID(int=value)
+
+
+def generate_uuid():
+    """
+    Primary key default for shopping lists and items. Returns a uuid7 when
+    ``SHOPPING_LIST_UUID_VERSION`` is 7 and a random uuid4 otherwise.
+    """
+    if settings.SHOPPING_LIST_UUID_VERSION == 7:
+        return uuid7()
+    return uuid.uuid4()
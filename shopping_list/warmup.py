@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.urls import URLResolver, get_resolver
+
+
+def _walk(resolver, views):
+    resolver.pattern.regex
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            # Leave lazy_include URLconfs that nothing has used yet unloaded.
+            if isinstance(pattern.urlconf_name, str) and "urlconf_module" not in pattern.__dict__:
+                continue
+            _walk(pattern, views)
+        else:
+            pattern.pattern.regex
+            view_class = getattr(pattern.callback, "view_class", None)
+            if view_class is not None:
+                views.append(view_class)
+
+
+def warm_up():
+    """
+    Does the one-off work of the first request ahead of time: imports the
+    URLconf, compiles its patterns and builds the field maps of every API
+    serializer, which also fills the models' _meta caches. Database
+    connections are left alone so nothing is shared with forked workers.
+    """
+    views = []
+    _walk(get_resolver(), views)
+    for view_class in views:
+        serializer_class = getattr(view_class, "serializer_class", None)
+        if serializer_class is not None:
+            serializer_class().fields
+    return views
+
+
+def warm_up_if_enabled():
+    if settings.SHOPPING_LIST_WARM_UP:
+        warm_up()